@@ -0,0 +1,151 @@
+"""Render pipeline benchmark.
+
+Generates synthetic image corpora, renders every pipeline variant end to end through the app's own render_slideshow
+(validation, proxies, FFmpeg) and records wall time, stage times, fps, FFmpeg's peak RSS and output size to JSON. Pass --baseline to compare against a previous run.
+
+  python benchmark.py --counts 20 200 --resolutions 1280x720 3840x2160 --save-baseline baseline.json
+  python benchmark.py --baseline baseline.json
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy
+
+import main
+
+DEFAULT_RESULTS_FILE = "benchmark_results.json"
+
+def _parse_resolution(value):
+    try:
+        w, h = (int(v) for v in value.lower().split('x'))
+        return w, h
+    except ValueError: raise argparse.ArgumentTypeError(f"Invalid resolution '{value}', expected WIDTHxHEIGHT.")
+
+def generate_corpus(directory, count, width, height, seed=0):
+    """Writes count synthetic images around width x height. Sizes, orientations and formats are mixed so the scale/pad filter is exercised."""
+    directory.mkdir(parents=True, exist_ok=True)
+    existing = sorted(directory.glob("img_*"))
+    if len(existing) == count: return [str(p) for p in existing]
+    for p in existing: p.unlink()
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        scale = rng.choice((1.0, 1.0, 0.75, 0.5, 1.25))
+        w, h = max(16, int(width * scale)), max(16, int(height * scale))
+        if rng.random() < 0.25: w, h = h, w
+        ys, xs = numpy.mgrid[0:h, 0:w].astype(numpy.float32)
+        base = numpy.stack([(xs / w) * 255, (ys / h) * 255, ((xs + ys + i * 37) % 256)], axis=-1)
+        noise = numpy.random.default_rng(seed + i).integers(0, 32, size=(h, w, 3), dtype=numpy.uint8)
+        img = numpy.clip(base, 0, 223).astype(numpy.uint8) + noise
+        path = directory / f"img_{i:06d}{'.png' if i % 3 == 0 else '.jpg'}"
+        if not cv2.imwrite(str(path), img): raise RuntimeError(f"Could not write {path}")
+        paths.append(str(path))
+    return paths
+
+def pipeline_variants(downscale_factor):
+    """Yields (variant_name, variant) for every pipeline this tree can render."""
+    for profile_str, data in main.OUTPUT_PROFILES.items():
+        for factor in (None, downscale_factor):
+            yield f"concat/{data['codec']}/{'downscale-' + str(factor) if factor else 'original'}", {'profile_str': profile_str, 'downscale_factor': factor}
+    for factor in (None, downscale_factor):
+        yield f"multi/all-profiles/{'downscale-' + str(factor) if factor else 'original'}", {'profile_str': main.DEFAULT_OUTPUT_PROFILE, 'downscale_factor': factor, 'multi': True}
+
+def run_variant(ffmpeg, input_files, variant, delay_sec, crf_overrides, work_dir):
+    """Renders one variant with the settings main.resolve_render_settings makes of the equivalent job, so sizes, rounding and
+    stages match the app's. Peak RSS and frame counts come from FFmpeg's -benchmark and progress output."""
+    profile_str, factor = variant['profile_str'], variant['downscale_factor']
+    job = {'output_profile': profile_str, 'quality_crf': str(crf_overrides.get(main.OUTPUT_PROFILES[profile_str]['codec'], 36)),
+           'time_per_image_sec': str(delay_sec), 'downscale_enabled': bool(factor), 'downscale_factor': str(factor or 1.0),
+           'extra_output_profiles': [p for p in main.OUTPUT_PROFILES if p != profile_str] if variant.get('multi') else []}
+    try: settings = main.resolve_render_settings(job, input_files, memory_limit_mb=0)
+    except ValueError as e: return {'exit_code': -1, 'error': str(e)}
+    output_file = str(work_dir / f"out{settings['container']}")
+    output_files = main.render_output_files(settings, output_file)
+    metrics = main.RenderMetrics()
+    result = {'outputs': len(output_files), 'output_resolution': f"{settings['target_width']}x{settings['target_height']}"}
+    start = time.perf_counter()
+    try: main.render_slideshow(ffmpeg, input_files, settings, output_file, memory_limit_mb=0, metrics=metrics)
+    except main.RenderError as e: result['error'] = e.stderr_tail
+    except Exception as e: result['error'] = str(e)
+    wall = time.perf_counter() - start
+    frames = metrics.counters['frames_encoded']
+    existing = [path for path in output_files if os.path.exists(path)]
+    result.update({'exit_code': -1 if metrics.exit_code is None else metrics.exit_code, 'wall_time_sec': round(wall, 3), 'frames_encoded': frames,
+                   'fps': round(frames / wall, 2) if wall > 0 else None, 'peak_rss_kb': metrics.ffmpeg.get('maxrss_kb'),
+                   'output_bytes': sum(os.path.getsize(path) for path in existing) if existing else None, 'stages_sec': dict(metrics.stages)})
+    for path in existing + [f"{output_file}.metrics.json"]:
+        with contextlib.suppress(OSError): os.remove(path)
+    return result
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Returns a list of human readable regression descriptions."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous or current.get('exit_code') != 0: continue
+        for metric in ('wall_time_sec', 'peak_rss_kb', 'output_bytes'):
+            old, new = previous.get(metric), current.get(metric)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{key}: {metric} {old} -> {new} (+{(new / old - 1) * 100:.1f}%)")
+    return regressions
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ImagesToVideoSlideshow render pipeline.")
+    parser.add_argument('--counts', type=int, nargs='+', default=[20, 100], help="Image counts per corpus.")
+    parser.add_argument('--resolutions', type=_parse_resolution, nargs='+', default=[(1280, 720), (3840, 2160)], help="Base resolutions, e.g. 1920x1080.")
+    parser.add_argument('--delay', type=float, default=0.5, help="Seconds per image.")
+    parser.add_argument('--downscale-factor', type=float, default=0.5, help="Factor used by the downscale-on variants.")
+    parser.add_argument('--only', default=None, help="Regex; only run variants whose key matches.")
+    parser.add_argument('--ffmpeg', default=main.find_ffmpeg_executable(), help="FFmpeg executable.")
+    parser.add_argument('--corpus-dir', default=str(Path(tempfile.gettempdir()) / "ImagesToVideoSlideshowBench"), help="Where synthetic images are cached.")
+    parser.add_argument('--output', default=DEFAULT_RESULTS_FILE, help="Results JSON file.")
+    parser.add_argument('--baseline', default=None, help="Baseline JSON to compare against.")
+    parser.add_argument('--save-baseline', default=None, help="Also write results to this baseline file.")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="Allowed relative slowdown before a metric counts as a regression.")
+    args = parser.parse_args(argv)
+    if not args.ffmpeg: parser.error("FFmpeg not found, pass --ffmpeg.")
+    logging.getLogger().setLevel(logging.WARNING)
+    only = re.compile(args.only) if args.only else None
+    crf_overrides = {'libx264': 28}
+    results = {}
+    for (width, height) in args.resolutions:
+        for count in args.counts:
+            corpus_name = f"{count}x{width}x{height}"
+            corpus_dir = Path(args.corpus_dir) / corpus_name
+            print(f"Generating corpus {corpus_name}...", flush=True)
+            input_files = generate_corpus(corpus_dir, count, width, height)
+            with tempfile.TemporaryDirectory() as work_dir:
+                for variant_name, variant in pipeline_variants(args.downscale_factor):
+                    key = f"{corpus_name}/{variant_name}"
+                    if only and not only.search(key): continue
+                    print(f"  {key}...", end=' ', flush=True)
+                    result = run_variant(args.ffmpeg, input_files, variant, args.delay, crf_overrides, Path(work_dir))
+                    results[key] = result
+                    print(f"{result['wall_time_sec']}s, {result['fps']} fps, {result['peak_rss_kb']} kB RSS" if result['exit_code'] == 0 else f"FAILED ({result['exit_code']})", flush=True)
+    report = {'ffmpeg': args.ffmpeg, 'platform': platform.platform(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+    with open(args.output, 'w') as f: json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f: json.dump(report, f, indent=4)
+        print(f"Baseline written to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f: baseline = json.load(f).get('results', {})
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for line in regressions: print(f"REGRESSION {line}")
+        if regressions: return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+    return 0 if all(r['exit_code'] == 0 for r in results.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
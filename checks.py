@@ -0,0 +1,314 @@
+"""Self-checks: end-to-end scenarios that need a real FFmpeg or a live local server, plus offline checks of the pure-Python
+parts (image header parsers, path-list encoding, keyframe expressions, resolution planning, the config writer).
+
+Each check works on small synthetic files in a temporary folder and compares the result with what the app promises.
+Without FFmpeg (or with --offline) only the offline checks run.
+
+  python checks.py
+  python checks.py --offline
+  python checks.py --only mosaic --ffmpeg /usr/local/bin/ffmpeg
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import re
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+
+import cv2
+import numpy
+
+import main
+
+CHECKS = []
+
+def check(func):
+    CHECKS.append(func)
+    return func
+
+def offline_check(func):
+    func.offline = True
+    return check(func)
+
+def expect(condition, message):
+    if not condition: raise AssertionError(message)
+
+def _write_solid_images(directory, values, size=(320, 240)):
+    paths = []
+    for i, value in enumerate(values):
+        path = Path(directory) / f"solid_{i:03d}_{value}.png"
+        cv2.imwrite(str(path), numpy.full((size[1], size[0], 3), value, numpy.uint8))
+        paths.append(str(path))
+    return paths
+
+def _decode_first_frame_luma(ffmpeg, video_file, width, height):
+    result = subprocess.run([ffmpeg, '-v', 'error', '-i', video_file, '-frames:v', '1', '-f', 'rawvideo', '-pix_fmt', 'yuv420p', 'pipe:1'],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return numpy.frombuffer(result.stdout, numpy.uint8)[:width * height].reshape(height, width)
+
+@check
+def mosaic_keeps_video_levels(ffmpeg, work_dir):
+    """Black and white grid tiles must come out as Y=16 and Y=235, not range-expanded a second time."""
+    paths = _write_solid_images(work_dir, (0, 255, 255, 0))
+    job = dict(main.JOB_DEFAULTS, output_profile="H.264 - .mp4", quality_crf="0", downscale_enabled=False, mosaic_grid="2x2")
+    settings = main.resolve_render_settings(job, base_size=(640, 480))
+    output_file = str(Path(work_dir) / "levels.mp4")
+    main.render_slideshow(ffmpeg, paths, settings, output_file)
+    luma = _decode_first_frame_luma(ffmpeg, output_file, 640, 480)
+    black, white = int(luma[120, 160]), int(luma[120, 480])
+    expect(abs(black - 16) <= 2, f"black tile has Y={black}, expected 16")
+    expect(abs(white - 235) <= 2, f"white tile has Y={white}, expected 235")
+
+@check
+def quality_samples_land_on_each_image(ffmpeg, work_dir):
+    """One decode pass must return a frame showing each image, including irregular and sub-frame durations."""
+    values = (20, 60, 100, 140, 180, 220, 250)
+    durations = (0.7, 1.2, 0.3, 0.02, 0.5, 0.9, 0.7)
+    paths = _write_solid_images(work_dir, values)
+    concat_path = Path(work_dir) / "concat.txt"
+    concat_path.write_text("".join(f"file '{p}'\nduration {d}\n" for p, d in zip(paths, durations)) + f"file '{paths[-1]}'\n")
+    starts = sorted(set(round(sum(durations[:i]), 6) for i in range(len(durations))))
+    for ext, codec in (('mp4', 'libx264'), ('webm', 'libvpx-vp9')):
+        output_file = str(Path(work_dir) / f"timing.{ext}")
+        subprocess.run([ffmpeg, '-v', 'error', '-y', '-f', 'concat', '-safe', '0', '-i', str(concat_path), '-vf', 'format=yuv420p', '-c:v', codec, output_file],
+                       check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        shown = [int(numpy.argmin([abs(int(frame.mean()) - v) for v in values])) for _, frame in main.iter_video_frames_at(ffmpeg, output_file, starts, 320, 240)]
+        expected = [i for i, d in enumerate(durations) if d >= 0.04] # A 20 ms image never gets its own frame at 25 fps.
+        expect(all(i in shown for i in expected), f"{ext}: frames show images {shown}, expected {expected}")
+
+@check
+def streaming_keyframes_and_cleanup(ffmpeg, work_dir):
+    """DASH keyframes must sit on every image start, also after an animation; removing the outputs must spare look-alike files."""
+    paths = _write_solid_images(work_dir, (20, 80, 140, 200))
+    if main.Image: # An animation shifts every later start off the regular grid.
+        frames = [main.Image.new('RGB', (320, 240), (v, v, v)) for v in (50, 100, 150)]
+        frames[0].save(Path(work_dir) / "anim.gif", save_all=True, append_images=frames[1:], duration=[300, 400, 350], loop=0)
+        paths.insert(2, str(Path(work_dir) / "anim.gif"))
+    bystander = Path(work_dir) / "show_notes.txt"
+    bystander.write_text("not a render output")
+    job = dict(main.JOB_DEFAULTS, output_profile="H.264 - .mp4", time_per_image_sec="0.7", downscale_enabled=False, streaming_format="DASH (.mpd)")
+    settings = main.resolve_render_settings(job, base_size=(320, 240))
+    manifest = str(Path(work_dir) / "show.mpd")
+    main.render_slideshow(ffmpeg, paths, settings, manifest)
+    _, animations = main.validate_inputs(paths)
+    starts = main.image_start_times(paths, dict(settings, animations=animations))
+    result = subprocess.run([ffmpeg, '-hide_banner', '-i', manifest, '-vf', "select='eq(pict_type,I)',showinfo", '-f', 'null', '-'],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    keyframes = [float(t) for t in re.findall(r'pts_time:\s*([\d.]+)', result.stderr)]
+    missing = [t for t in starts if not any(0 <= k - t < 0.05 for k in keyframes)]
+    expect(not missing, f"no keyframe at image starts {missing} (keyframes {keyframes})")
+    main.remove_render_outputs(manifest, [manifest], settings['streaming_format'])
+    leftovers = sorted(p.name for p in Path(work_dir).glob("show*"))
+    expect(leftovers == [bystander.name], f"after removal found {leftovers}")
+
+@check
+def service_on_free_port(ffmpeg, work_dir):
+    """The render service must answer every request: bad job types get 400, missing tokens 401, and a job can be rendered,
+    downloaded and deleted with its files."""
+    service = main.RenderService(ffmpeg, Path(work_dir) / "service")
+    server = main.create_render_server(service, '127.0.0.1', 0, token="secret")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    def request(method, path, body=None, token="secret", headers=None):
+        connection = http.client.HTTPConnection(*server.server_address, timeout=30)
+        headers = dict(headers or {}, **({'Authorization': f"Bearer {token}"} if token else {}))
+        connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = connection.getresponse()
+        data = response.read(); connection.close()
+        return response.status, data
+    try:
+        paths = _write_solid_images(work_dir, (40, 200))
+        expect(request('GET', '/jobs', token=None)[0] == 401, "request without token was not refused")
+        expect(request('GET', '/jobs', headers={'Origin': 'http://evil.example'})[0] == 403, "cross-origin request was not refused")
+        for bad in ({"files": 5}, {"settings": []}, {"files": paths, "mosaic_grid": []}, {"files": paths, "crf": True}, {"files": paths, "delay": "inf"},
+                    {"files": paths, "delay": "nan"}, ["not", "an", "object"]):
+            status, _ = request('POST', '/jobs', bad)
+            expect(status == 400, f"{bad} got HTTP {status}, expected 400")
+        status, data = request('POST', '/jobs', {"files": paths, "profile": "H.264 - .mp4", "delay": 0.5, "downscale": None})
+        expect(status == 202, f"job submit got HTTP {status}: {data!r}")
+        job_id = json.loads(data)['id']
+        deadline = time.monotonic() + 60
+        while json.loads(request('GET', f'/jobs/{job_id}')[1])['status'] not in ('done', 'failed', 'cancelled'):
+            expect(time.monotonic() < deadline, "job did not finish within 60 s"); time.sleep(0.2)
+        status, data = request('GET', f'/jobs/{job_id}/output')
+        expect(status == 200 and data[4:8] == b'ftyp', f"output download got HTTP {status}, {len(data)} bytes")
+        expect(request('DELETE', f'/jobs/{job_id}')[0] == 200, "delete of a finished job failed")
+        expect(request('GET', f'/jobs/{job_id}')[0] == 404, "deleted job is still listed")
+        expect(not (Path(work_dir) / "service" / job_id).exists(), "deleted job's files are still on disk")
+    finally:
+        server.shutdown(); server.server_close(); service.shutdown()
+
+def _jpeg(width, height, orientation=None, icc_chunks=()):
+    """Header-only JPEG: SOI, an optional EXIF orientation (big-endian TIFF), APP2 ICC chunks as (seq, total, data), SOF0."""
+    data = b'\xff\xd8'
+    if orientation:
+        tiff = b'MM\x00\x2a' + struct.pack('>I', 8) + struct.pack('>H', 1) + struct.pack('>HHI', 0x0112, 3, 1) + struct.pack('>H', orientation) + b'\0\0' + b'\0' * 4
+        segment = b'Exif\0\0' + tiff
+        data += b'\xff\xe1' + struct.pack('>H', len(segment) + 2) + segment
+    for seq, total, chunk in icc_chunks:
+        segment = b'ICC_PROFILE\0' + bytes([seq, total]) + chunk
+        data += b'\xff\xe2' + struct.pack('>H', len(segment) + 2) + segment
+    return data + b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00' + b'\xff\xd9'
+
+def _png_chunk(ctype, data): return struct.pack('>I', len(data)) + ctype + data + b'\0\0\0\0' # CRCs are never checked.
+
+def _apng(width, height, delays):
+    data = b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+    data += _png_chunk(b'acTL', struct.pack('>II', len(delays), 0))
+    for i, (num, den) in enumerate(delays):
+        data += _png_chunk(b'fcTL', struct.pack('>IIIIIHHBB', 2 * i, width, height, 0, 0, num, den, 0, 0))
+        data += _png_chunk(b'IDAT' if i == 0 else b'fdAT', b'\0' * 8)
+    return data + _png_chunk(b'IEND', b'')
+
+def _gif(width, height, delays_cs):
+    data = b'GIF89a' + struct.pack('<HHBBB', width, height, 0, 0, 0)
+    for delay in delays_cs:
+        data += b'\x21\xf9\x04\x00' + struct.pack('<H', delay) + b'\x00\x00'
+        data += b'\x2c' + struct.pack('<HHHHB', 0, 0, width, height, 0) + b'\x02\x02\x4c\x01\x00'
+    return data + b'\x3b'
+
+def _animated_webp(width, height, durations_ms):
+    chunks = b'VP8X' + struct.pack('<I', 10) + b'\x02\0\0\0' + (width - 1).to_bytes(3, 'little') + (height - 1).to_bytes(3, 'little')
+    chunks += b'ANIM' + struct.pack('<I', 6) + b'\0' * 6
+    for duration in durations_ms:
+        frame = b'\0' * 6 + (width - 1).to_bytes(3, 'little') + (height - 1).to_bytes(3, 'little') + duration.to_bytes(3, 'little') + b'\0' + b'\0' * 16
+        chunks += b'ANMF' + struct.pack('<I', len(frame)) + frame
+    return b'RIFF' + struct.pack('<I', 4 + len(chunks)) + b'WEBP' + chunks
+
+def _write(work_dir, name, data):
+    path = Path(work_dir) / name
+    path.write_bytes(data)
+    return str(path)
+
+@offline_check
+def exif_orientation_and_icc_segments(ffmpeg, work_dir):
+    """EXIF orientations 6 and 8 swap the displayed size, 3 does not; an ICC profile split over APP2 segments (stored out of
+    order) is joined by sequence number, and sRGB profiles are dropped."""
+    for orientation, expected in ((None, (200, 100)), (3, (200, 100)), (6, (100, 200)), (8, (100, 200))):
+        metadata = main.read_image_metadata(_write(work_dir, f"o{orientation}.jpg", _jpeg(200, 100, orientation)))
+        expect(metadata[:3] == (*expected, orientation or 1), f"orientation {orientation}: read {metadata[:3]}")
+    profile = bytes(16) + b'RGB ' + bytes(range(256)) * 300 # Display-P3-like: an RGB profile without the sRGB tag.
+    parts = [profile[:30000], profile[30000:60000], profile[60000:]]
+    icc_jpeg = _jpeg(64, 48, 6, [(2, 3, parts[1]), (1, 3, parts[0]), (3, 3, parts[2])])
+    metadata = main.read_image_metadata(_write(work_dir, "icc.jpg", icc_jpeg))
+    expect(metadata[:3] == (48, 64, 6) and metadata[3] == profile, f"multi-segment ICC read as {len(metadata[3] or b'')} bytes, size {metadata[:2]}")
+    srgb = bytes(16) + b'RGB ' + b'sRGB IEC61966-2.1' * 10
+    expect(main.read_image_metadata(_write(work_dir, "srgb.jpg", _jpeg(64, 48, icc_chunks=[(1, 1, srgb)])))[3] is None, "sRGB profile was kept")
+
+@offline_check
+def animation_timings_and_truncated_headers(ffmpeg, work_dir):
+    """GIF, APNG and WebP frame delays come from the containers; every truncation of those files is reported as a bad input
+    (or read as far as it goes) and never raises anything but ValueError."""
+    samples = {'anim.gif': (_gif(40, 30, [50, 1, 120]), [0.5, 0.1, 1.2]),
+               'anim.png': (_apng(40, 30, [(1, 2), (0, 100), (30, 0)]), [0.5, 1 / 15, 0.3]),
+               'anim.webp': (_animated_webp(40, 30, [400, 250, 1000]), [0.4, 0.25, 1.0])}
+    for name, (data, delays) in samples.items():
+        path = _write(work_dir, name, data)
+        size, _, error, durations = main.check_input_image(path)
+        expect(error is None and size == (40, 30), f"{name}: size {size}, error {error}")
+        expect(durations and all(math.isclose(a, b) for a, b in zip(durations, delays)) and len(durations) == len(delays), f"{name}: delays {durations}, expected {delays}")
+        for cut in range(1, len(data)):
+            truncated = _write(work_dir, f"cut{cut}_{name}", data[:cut])
+            try: main.check_input_image(truncated)
+            except Exception as e: raise AssertionError(f"{name} cut at {cut} bytes: check_input_image raised {e!r}")
+            try: main.read_image_metadata(truncated)
+            except ValueError: pass
+            except Exception as e: raise AssertionError(f"{name} cut at {cut} bytes: read_image_metadata raised {e!r}")
+
+@offline_check
+def path_list_round_trips(ffmpeg, work_dir):
+    """encode_file_list/decode_file_list keep order and duplicates across interleaved folders; damaged lists raise ValueError."""
+    cases = [[], ["/a/1.jpg"], ["/a/1.jpg", "/a/2.jpg", "/b/1.jpg", "/a/3.jpg", "/a/3.jpg"], ["x.png", "sub/y.png", "x.png"],
+             [f"/photos/{d}/ünïcode {i}.jpg" for d in ("2023", "2024", "2023") for i in range(50)]]
+    for paths in cases:
+        encoded = json.loads(json.dumps(main.encode_file_list(paths)))
+        expect(main.decode_file_list(encoded) == paths, f"round trip changed {paths[:5]}")
+    expect(len(main.encode_file_list(cases[-1])['runs']) == 3, "consecutive files from one folder did not share a run")
+    for damaged in ({'dirs': ["a"], 'runs': [[0, 3]], 'names': ["x"]}, {'dirs': ["a"], 'runs': [[0, 1]], 'names': ["x", "y"]},
+                    {'dirs': ["a"], 'runs': [[1, 1]], 'names': ["x"]}, {'dirs': ["a"], 'runs': [[-1, 1]], 'names': ["x"]},
+                    {'dirs': ["a"], 'runs': [[0, 0], [0, 1]], 'names': ["x"]}, {'dirs': ["a"], 'runs': [0, 1], 'names': ["x"]}):
+        try: main.decode_file_list(damaged)
+        except ValueError: continue
+        raise AssertionError(f"damaged list {damaged} was accepted")
+
+def _eval_ffmpeg_expr(expr, t, registers):
+    """Evaluates the subset of FFmpeg's expression language start_crossing_expr uses."""
+    def st(i, value): registers[int(i)] = value; return value
+    names = {'st': st, 'ld': lambda i: registers[int(i)], 'lt': lambda a, b: float(a < b), 'gt': lambda a, b: float(a > b),
+             'if_': lambda c, a, b: a if c else b, 'min': min, 'floor': math.floor, 't': t}
+    value = None
+    for statement in expr.split(';'): value = eval(statement.replace('if(', 'if_('), {'__builtins__': {}}, names)
+    return value
+
+@offline_check
+def keyframe_expression_on_irregular_starts(ffmpeg, work_dir):
+    """start_crossing_expr fires on exactly the first 25 fps frame at or after each start, for regular, irregular and mixed
+    start times; a regular slideshow collapses into one arithmetic run."""
+    regular = [round(i * 1.5, 6) for i in range(200)]
+    expect(main._arithmetic_runs(regular) == [(0.0, 1.5, 200)], f"regular starts gave runs {main._arithmetic_runs(regular)[:3]}")
+    cases = [regular[:20], [0.0, 0.7, 1.9, 2.2, 2.5, 2.8, 3.1, 5.0, 5.02, 6.0, 6.5, 7.0, 9.97],
+             [0.0, 0.3, 0.6, 0.9, 2.0, 2.05, 2.1, 2.15, 4.0, 4.7, 5.4, 6.1, 6.12]]
+    for times in cases:
+        expr, registers = main.start_crossing_expr(times), [0.0] * 10
+        frame_times = [k / 25 for k in range(int(times[-1] * 25) + 5)]
+        fired = [k for k, t in enumerate(frame_times) if _eval_ffmpeg_expr(expr, t, registers)]
+        expected = sorted({next(k for k, t in enumerate(frame_times) if t + main.QUALITY_FRAME_TOLERANCE_SEC >= start) for start in times})
+        expect(fired == expected, f"starts {times}: expression fired on frames {fired}, expected {expected}")
+
+@offline_check
+def resolution_plan_from_headers(ffmpeg, work_dir):
+    """plan_output_resolution takes the median aspect and pixel count (capped), with even sizes, from header reads alone."""
+    sizes = [(1920, 1080)] * 5 + [(1080, 1920), (4000, 3000), (641, 359)]
+    paths = [_write(work_dir, f"plan_{i}.jpg", _jpeg(w, h)) for i, (w, h) in enumerate(sizes)]
+    paths.append(_write(work_dir, "plan_bad.jpg", b'\xff\xd8\xff'))
+    plan = main.plan_output_resolution(paths, max_pixels=1280 * 720)
+    expect(plan['width'] % 2 == 0 and plan['height'] % 2 == 0, f"odd planned size {plan['width']}x{plan['height']}")
+    expect(plan['width'] * plan['height'] <= 1280 * 720 and abs(plan['width'] / plan['height'] - 16 / 9) < 0.01, f"planned {plan['width']}x{plan['height']}")
+    expect(plan['images_measured'] == len(sizes) and plan['images_unreadable'] == 1, f"plan counted {plan['images_measured']}/{plan['images_unreadable']}")
+    expect(main.output_target_size(1001, 667, 0.5) == (500, 332), "odd downscaled target was not rounded to even")
+
+@offline_check
+def config_writer_coalesces_saves(ffmpeg, work_dir):
+    """Bursts of CoalescingWriter.save() end in one or two atomic writes of the latest data; flush() writes what is pending."""
+    path, writes = Path(work_dir) / "config.json", []
+    def serialize(data): writes.append(data); return json.dumps(data).encode('utf-8')
+    writer = main.CoalescingWriter(path, serialize, delay_sec=0.05)
+    for i in range(200): writer.save({'n': i})
+    time.sleep(0.3)
+    expect(json.loads(path.read_text()) == {'n': 199} and 1 <= len(writes) <= 2, f"{len(writes)} writes, file {path.read_text()}")
+    writer.save({'n': 200}); writer.flush()
+    expect(json.loads(path.read_text()) == {'n': 200}, "flush() did not write the pending save")
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ImagesToVideoSlideshow end-to-end checks.")
+    parser.add_argument('--ffmpeg', default=main.find_ffmpeg_executable(), help="FFmpeg executable.")
+    parser.add_argument('--only', default=None, help="Regex; only run checks whose name matches.")
+    parser.add_argument('--offline', action='store_true', help="Only run the checks that need no FFmpeg.")
+    args = parser.parse_args(argv)
+    if not args.ffmpeg and not args.offline: print("FFmpeg not found (pass --ffmpeg); running the offline checks only."); args.offline = True
+    logging.getLogger().setLevel(logging.WARNING)
+    only = re.compile(args.only) if args.only else None
+    failures = 0
+    for func in CHECKS:
+        if only and not only.search(func.__name__): continue
+        if args.offline and not getattr(func, 'offline', False): continue
+        print(f"{func.__name__}...", end=' ', flush=True)
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as work_dir:
+            try: func(args.ffmpeg, work_dir)
+            except Exception:
+                failures += 1
+                print("FAILED"); traceback.print_exc(); continue
+        print(f"ok ({time.perf_counter() - start:.1f}s)")
+    print(f"{failures} check(s) failed." if failures else "All checks passed.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -33,6 +33,37 @@ import zipfile
 import logging
 import traceback
 import ctypes
+import signal
+import shutil
+import time
+import re
+import contextlib
+import glob
+import cProfile
+import pstats
+import struct
+import hashlib
+import concurrent.futures
+import multiprocessing
+import multiprocessing.util
+from multiprocessing import shared_memory
+import statistics
+import math
+import functools
+import zlib
+import io
+import gzip
+import uuid
+import itertools
+import collections
+import http.server
+import urllib.parse
+import secrets
+import hmac
+try:
+    from PIL import Image, ImageCms
+except ImportError:
+    Image = ImageCms = None # Optional: only needed to convert wide-gamut (e.g. Display P3) photos to sRGB.
 
 if platform.system() == "Linux":
     try:
@@ -49,12 +80,1707 @@ OUTPUT_PROFILES = {
 }
 DEFAULT_OUTPUT_PROFILE = "VP9 - .webm"
 
+UI_DEBOUNCE_MS = 150 # Bursts of variable writes (typing, presets, config load) within this window cause one recompute.
+UI_POLL_MS = 30
+
 CRF_STATUS_COLORS = {
     "default": "#333333", "very_high": "#2ECC71", "high": "#1E8449",
     "medium": "#D4AC0D", "low": "#E67E22", "very_low": "#C0392B",
     "error": "red", "unknown": "grey", "info": "#00008B"
 }
 
+BACKGROUND_NICE_INCREMENT = 10
+
+def _background_priority_popen_args(cmd, creationflags=0):
+    """Returns (cmd, popen_kwargs) that run FFmpeg at a lower CPU/IO priority on a subset of cores. On POSIX the command is
+    prefixed with nice/taskset/ionice, which exec FFmpeg in place (same pid, so pause/cancel still work); a preexec_fn is not
+    safe in this threaded process, and changing the pid after Popen would miss threads FFmpeg has already started."""
+    if platform.system() == "Windows":
+        return cmd, {'creationflags': creationflags | getattr(subprocess, 'BELOW_NORMAL_PRIORITY_CLASS', 0)}
+    prefix = []
+    if shutil.which('nice'): prefix += ['nice', '-n', str(BACKGROUND_NICE_INCREMENT)]
+    if hasattr(os, 'sched_getaffinity') and shutil.which('taskset'):
+        allowed = sorted(os.sched_getaffinity(0))
+        if len(allowed) > 1: prefix += ['taskset', '-c', ",".join(map(str, allowed[len(allowed) - max(1, len(allowed) // 2):]))]
+    if platform.system() == "Linux" and shutil.which('ionice'): prefix += ['ionice', '-c', '3']
+    return prefix + list(cmd), {}
+
+def _set_process_suspended(process, suspended):
+    """Pauses/resumes a running process. SIGSTOP/SIGCONT on POSIX, NtSuspendProcess/NtResumeProcess on Windows."""
+    if platform.system() == "Windows":
+        ntdll = ctypes.windll.ntdll
+        status = (ntdll.NtSuspendProcess if suspended else ntdll.NtResumeProcess)(ctypes.c_void_p(int(process._handle)))
+        if status != 0: raise OSError(f"NT status {status:#x}")
+    else: os.kill(process.pid, signal.SIGSTOP if suspended else signal.SIGCONT)
+
+IMAGE_EXTENSIONS = ('.png', '.apng', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+ANIMATED_EXTENSIONS = ('.gif', '.png', '.apng', '.webp')
+LARGE_IMAGE_MIN_PIXELS = 40_000_000
+DEFAULT_MEMORY_LIMIT_MB = 4096
+FFMPEG_FRAME_BUFFERS = 32 # Rough count of output-sized yuv420p frames FFmpeg keeps alive (lookahead, references, filter queues).
+PROXY_CACHE_DIR = Path(tempfile.gettempdir()) / "ImagesToVideoSlideshowCache"
+PROXY_CACHE_MAX_BYTES = 2 * 1024 ** 3
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+EXIF_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8) # EXIF orientations that swap width and height when displayed.
+IMAGE_METADATA_CACHE_SIZE = 65536
+
+def _parse_exif_orientation(tiff):
+    """Orientation tag (0x0112) from IFD0 of a TIFF-structured EXIF block, 1 when absent or unreadable."""
+    try:
+        endian = '<' if tiff[:2] == b'II' else '>'
+        ifd = struct.unpack(endian + 'I', tiff[4:8])[0]
+        for i in range(struct.unpack(endian + 'H', tiff[ifd:ifd + 2])[0]):
+            tag, _, _, value = struct.unpack(endian + 'HHI4s', tiff[ifd + 2 + i * 12:ifd + 14 + i * 12])
+            if tag == 0x0112:
+                orientation = struct.unpack(endian + 'H', value[:2])[0]
+                return orientation if 1 <= orientation <= 8 else 1
+    except struct.error: pass
+    return 1
+
+def _non_srgb_icc_profile(icc_profile):
+    """Returns icc_profile if it is an RGB profile other than sRGB (e.g. Display P3, Adobe RGB), otherwise None."""
+    if not icc_profile or icc_profile[16:20] != b'RGB ': return None
+    if b'sRGB' in icc_profile or 'sRGB'.encode('utf-16-be') in icc_profile: return None
+    return icc_profile
+
+def _read_jpeg_header(f):
+    """Returns (width, height, exif_orientation, icc_profile) from the markers up to the first frame header."""
+    f.seek(2)
+    orientation, icc_chunks = 1, {}
+    while True:
+        byte = f.read(1)
+        if not byte: break
+        if byte != b'\xff': continue
+        marker = f.read(1)
+        while marker == b'\xff': marker = f.read(1)
+        if not marker: break
+        code = marker[0]
+        if code in (0x01, 0xD8) or 0xD0 <= code <= 0xD7: continue
+        if code == 0xD9: break
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2: break
+        length = struct.unpack('>H', length_bytes)[0]
+        if code in JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5: break
+            h, w = struct.unpack('>HH', data[1:5])
+            return w, h, orientation, b''.join(icc_chunks[i] for i in sorted(icc_chunks)) or None
+        if code in (0xE1, 0xE2):
+            data = f.read(length - 2)
+            if code == 0xE1 and data.startswith(b'Exif\0\0'): orientation = _parse_exif_orientation(data[6:])
+            elif code == 0xE2 and data.startswith(b'ICC_PROFILE\0') and len(data) > 14: icc_chunks[data[12]] = data[14:]
+            continue
+        f.seek(length - 2, os.SEEK_CUR)
+    raise ValueError("JPEG has no frame header")
+
+def _read_png_icc_profile(f):
+    """Decompressed iCCP profile of a PNG, or None. iCCP must precede IDAT, so the scan stops there."""
+    f.seek(8)
+    while len(header := f.read(8)) == 8:
+        length, ctype = struct.unpack('>I4s', header)
+        if ctype in (b'IDAT', b'IEND'): break
+        if ctype == b'iCCP':
+            data = f.read(length)
+            try: return zlib.decompress(data[data.index(b'\0') + 2:])
+            except (ValueError, zlib.error): return None
+        f.seek(length + 4, os.SEEK_CUR)
+    return None
+
+def _read_webp_info(f):
+    """Returns (width, height, frame_durations_sec or None) from a WebP RIFF container."""
+    f.seek(12)
+    width = height = None; durations = []
+    while True:
+        header = f.read(8)
+        if len(header) < 8: break
+        ctype, length = header[:4], struct.unpack('<I', header[4:])[0]
+        data = f.read(min(length, 30))
+        if ctype == b'VP8X' and len(data) >= 10:
+            width, height = 1 + int.from_bytes(data[4:7], 'little'), 1 + int.from_bytes(data[7:10], 'little')
+        elif ctype == b'VP8 ' and width is None and len(data) >= 10:
+            if data[3:6] != b'\x9d\x01\x2a': raise ValueError("Corrupt WebP VP8 header")
+            width, height = struct.unpack('<HH', data[6:10]); width &= 0x3FFF; height &= 0x3FFF
+        elif ctype == b'VP8L' and width is None and len(data) >= 5:
+            if data[0] != 0x2F: raise ValueError("Corrupt WebP VP8L header")
+            bits = int.from_bytes(data[1:5], 'little')
+            width, height = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        elif ctype == b'ANMF' and len(data) >= 15: durations.append(int.from_bytes(data[12:15], 'little') / 1000.0)
+        f.seek(length + (length & 1) - len(data), os.SEEK_CUR)
+    if width is None: raise ValueError("WebP has no image chunk")
+    return width, height, durations or None
+
+def _skip_gif_sub_blocks(f):
+    while (size := f.read(1)) and size[0]: f.seek(size[0], os.SEEK_CUR)
+
+def _read_gif_frame_delays(f):
+    """Per-frame delays in seconds, walking the block structure without decoding any LZW data."""
+    f.seek(10)
+    flags = f.read(3)[0]
+    if flags & 0x80: f.seek(3 * (2 << (flags & 7)), os.SEEK_CUR)
+    delays, pending = [], None
+    while (block := f.read(1)) and block != b'\x3b':
+        if block == b'\x21':
+            label = f.read(1)
+            if label == b'\xf9':
+                data = f.read(f.read(1)[0])
+                pending = struct.unpack('<H', data[1:3])[0] if len(data) >= 3 else None
+            _skip_gif_sub_blocks(f)
+        elif block == b'\x2c':
+            packed = f.read(9)[8]
+            if packed & 0x80: f.seek(3 * (2 << (packed & 7)), os.SEEK_CUR)
+            f.read(1)
+            _skip_gif_sub_blocks(f)
+            delays.append((pending if pending and pending >= 2 else 10) / 100.0) # Same minimum as FFmpeg's gif demuxer.
+            pending = None
+        else: break
+    return delays
+
+def _read_apng_frame_delays(f):
+    """Per-frame delays in seconds for APNG, or None for a still PNG. acTL must precede IDAT, so still PNGs stop early."""
+    f.seek(8)
+    delays, animated = [], False
+    while len(header := f.read(8)) == 8:
+        length, ctype = struct.unpack('>I4s', header)
+        if ctype == b'acTL': animated = True
+        elif ctype == b'IDAT' and not animated: return None
+        elif ctype == b'IEND': break
+        elif ctype == b'fcTL' and length >= 24:
+            data = f.read(24)
+            delay_num, delay_den = struct.unpack('>HH', data[20:24])
+            delays.append(delay_num / (delay_den or 100) if delay_num else 1 / 15) # FFmpeg's apng demuxer plays 0-delay frames at 15 fps.
+            f.seek(length - 24 + 4, os.SEEK_CUR); continue
+        f.seek(length + 4, os.SEEK_CUR)
+    return delays if animated else None
+
+def read_animation_timings(path):
+    """Native per-frame durations (seconds) for animated GIF/APNG/WebP, read from the container without decoding. None for stills."""
+    with open(path, 'rb') as f:
+        head = f.read(12)
+        if head[:6] in (b'GIF87a', b'GIF89a'): delays = _read_gif_frame_delays(f)
+        elif head.startswith(b'\x89PNG\r\n\x1a\n'): delays = _read_apng_frame_delays(f)
+        elif head[:4] == b'RIFF' and head[8:12] == b'WEBP': delays = _read_webp_info(f)[2]
+        else: return None
+    return delays if delays and len(delays) > 1 else None
+
+@functools.lru_cache(maxsize=IMAGE_METADATA_CACHE_SIZE)
+def _read_image_metadata_cached(path, mtime_ns, nbytes):
+    orientation, icc_profile = 1, None
+    with open(path, 'rb') as f:
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            w, h = struct.unpack('>II', head[16:24]); icc_profile = _read_png_icc_profile(f)
+        elif head[:6] in (b'GIF87a', b'GIF89a'): w, h = struct.unpack('<HH', head[6:10])
+        elif head.startswith(b'BM') and len(head) >= 26:
+            if struct.unpack('<I', head[14:18])[0] == 12: w, h = struct.unpack('<HH', head[18:22])
+            else: w, h = struct.unpack('<ii', head[18:26]); h = abs(h)
+        elif head.startswith(b'\xff\xd8'): w, h, orientation, icc_profile = _read_jpeg_header(f)
+        elif head[:4] == b'RIFF' and head[8:12] == b'WEBP': w, h, _ = _read_webp_info(f)
+        else: raise ValueError("Unrecognized image header")
+    if w <= 0 or h <= 0: raise ValueError(f"Invalid image dimensions {w}x{h}")
+    if orientation in EXIF_TRANSPOSED_ORIENTATIONS: w, h = h, w
+    return w, h, orientation, _non_srgb_icc_profile(icc_profile)
+
+def read_image_metadata(path):
+    """Reads (width, height, exif_orientation, icc_profile) from the file header without decoding any pixels. width/height are
+    as displayed after EXIF rotation; icc_profile is only set for non-sRGB RGB profiles. Results are cached by path and mtime,
+    so dimension planning, validation and encoding all see the same numbers. Raises ValueError for unknown or corrupt headers."""
+    st = os.stat(path)
+    try: return _read_image_metadata_cached(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    except (IndexError, struct.error) as e: raise ValueError(f"Truncated or corrupt image header ({e})") from e
+
+def read_image_size(path):
+    """Displayed (width, height) from the file header, see read_image_metadata."""
+    return read_image_metadata(path)[:2]
+
+def read_display_size(path):
+    """Displayed (width, height), from the header when possible and by decoding the image otherwise. Raises ValueError."""
+    try: return read_image_size(path)
+    except ValueError as header_err: logging.info(f"Header read failed for {path} ({header_err}), decoding instead.")
+    img = cv2.imread(path)
+    if img is None: raise ValueError(f"Could not read: {path}")
+    h, w = img.shape[:2]
+    return w, h
+
+def needs_normalization(metadata):
+    """True when FFmpeg would render the image differently from how it is displayed (EXIF rotation or a wide-gamut profile)."""
+    _, _, orientation, icc_profile = metadata
+    return orientation != 1 or icc_profile is not None
+
+DEFAULT_MAX_OUTPUT_PIXELS = 3840 * 2160
+HEADER_READ_WORKERS = 16 # Header reads are I/O bound; a wide pool hides network filesystem latency.
+
+def read_images_metadata(paths, workers=HEADER_READ_WORKERS):
+    """Header-only read_image_metadata for every path, in parallel. Unreadable files (and None paths) map to None."""
+    def safe_read(path):
+        if path is None: return None
+        try: return read_image_metadata(path)
+        except (OSError, ValueError, IndexError, struct.error): return None
+    if not paths: return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool: return list(pool.map(safe_read, paths))
+
+def read_image_sizes(paths, workers=HEADER_READ_WORKERS):
+    """Header-only displayed (width, height) for every path, read in parallel. Unreadable files map to None."""
+    return [metadata[:2] if metadata else None for metadata in read_images_metadata(paths, workers)]
+
+class InputValidationError(ValueError):
+    """Raised before encoding when inputs are missing or unreadable. bad_inputs holds (path, reason) for every bad file."""
+    def __init__(self, bad_inputs):
+        self.bad_inputs = bad_inputs
+        listing = "\n".join(f"{os.path.basename(path)}: {reason}" for path, reason in bad_inputs[:10])
+        more = f"\n...and {len(bad_inputs) - 10} more." if len(bad_inputs) > 10 else ""
+        super().__init__(f"{len(bad_inputs)} image(s) are missing or unreadable:\n{listing}{more}")
+
+def check_input_image(path):
+    """Returns (size, nbytes, error, frame_durations). error is None when the file exists, is not empty and has a sane image
+    header; frame_durations is set for animated GIF/APNG/WebP."""
+    try:
+        nbytes = os.path.getsize(path)
+        if nbytes == 0: return None, 0, "empty file", None
+        size = read_image_size(path)
+        return size, nbytes, None, read_animation_timings(path) if path.lower().endswith(ANIMATED_EXTENSIONS) else None
+    except FileNotFoundError: return None, 0, "file not found", None
+    except PermissionError: return None, 0, "permission denied", None
+    except (OSError, ValueError, IndexError, struct.error) as e: return None, 0, str(e) or type(e).__name__, None
+
+def iter_checked_inputs(paths, workers=HEADER_READ_WORKERS):
+    """Yields (path, size, nbytes, error, frame_durations) in input order while the checks run in parallel. Only a few checks per
+    worker are in flight at once, so memory stays flat however long the list is and results stream as soon as they are ready."""
+    if not paths: return
+    workers = min(workers, len(paths))
+    pending, paths = collections.deque(), iter(paths)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for path in itertools.islice(paths, workers * 4): pending.append((path, pool.submit(check_input_image, path)))
+            while pending:
+                path, future = pending.popleft()
+                if (next_path := next(paths, None)) is not None: pending.append((next_path, pool.submit(check_input_image, next_path)))
+                yield (path, *future.result())
+        finally:
+            for _, future in pending: future.cancel()
+
+def validate_inputs(paths, metrics=None, progress_callback=None, workers=HEADER_READ_WORKERS):
+    """Checks every input in parallel, streaming through iter_checked_inputs. Returns (checked, animations): the number of
+    good inputs and a map of input index -> native frame durations. Raises InputValidationError listing all bad inputs."""
+    checked, animations, bad = 0, {}, []
+    for index, (path, _, nbytes, error, frame_durations) in enumerate(iter_checked_inputs(paths, workers)):
+        if error: bad.append((path, error)); logging.warning(f"Bad input image '{path}': {error}")
+        else:
+            checked += 1
+            if frame_durations: animations[index] = frame_durations
+            if metrics: metrics.count('images'); metrics.count('bytes_read', nbytes)
+        if progress_callback and (index + 1) % 500 == 0: progress_callback(f"Checked {index + 1}/{len(paths)} images...")
+    if bad: raise InputValidationError(bad)
+    if animations: logging.info(f"{len(animations)} animated input(s) will play with their native frame timings.")
+    return checked, animations
+
+def _even(value): return max(2, int(value) // 2 * 2)
+
+def output_target_size(width, height, factor=None):
+    """Encoded size for a base size and an optional downscale factor, rounded down to even numbers as yuv420p requires."""
+    if factor: width, height = width * factor, height * factor
+    return _even(width), _even(height)
+
+def _padding_fraction(sizes, W, H):
+    """Mean share of the W x H frame that scale+pad fills with black bars."""
+    return statistics.fmean(1 - (w * h * min(W / w, H / h) ** 2) / (W * H) for w, h in sizes)
+
+def plan_output_resolution(paths, max_pixels=DEFAULT_MAX_OUTPUT_PIXELS, workers=HEADER_READ_WORKERS):
+    """Proposes an output size from all images instead of the first one: median aspect ratio, median pixel count capped at
+    max_pixels, even dimensions for yuv420p. Also reports the encoder work saved compared with first-image sizing."""
+    all_sizes = read_image_sizes(paths, workers)
+    sizes = [size for size in all_sizes if size]
+    if not sizes: return None
+    aspect = statistics.median(w / h for w, h in sizes)
+    area = min(statistics.median(w * h for w, h in sizes), max_pixels)
+    W, H = _even(math.sqrt(area * aspect)), _even(math.sqrt(area / aspect))
+    first_w, first_h = all_sizes[0] or sizes[0]
+    return {'width': W, 'height': H, 'images_measured': len(sizes), 'images_unreadable': len(all_sizes) - len(sizes),
+            'median_aspect': round(aspect, 4), 'first_width': first_w, 'first_height': first_h,
+            'encoder_pixels_saved_pct': round((1 - (W * H) / (first_w * first_h)) * 100, 1),
+            'padding_first_pct': round(_padding_fraction(sizes, first_w, first_h) * 100, 1),
+            'padding_planned_pct': round(_padding_fraction(sizes, W, H) * 100, 1)}
+
+def _fit_inside(w, h, max_w, max_h):
+    scale = min(max_w / w, max_h / h, 1.0)
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+CV2_REDUCED_DECODE_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+def _reduced_decode_factor(path, w, h, target_w, target_h):
+    """Largest libjpeg DCT reduction (1, 2, 4 or 8) that still decodes at least the target size. Other formats always decode in full."""
+    if not path.lower().endswith(('.jpg', '.jpeg')): return 1
+    factor = 1
+    while factor < 8 and w // (factor * 2) >= target_w and h // (factor * 2) >= target_h: factor *= 2
+    return factor
+
+def estimate_decode_bytes(path, w, h, target_w, target_h):
+    factor = _reduced_decode_factor(path, w, h, target_w, target_h)
+    fit_w, fit_h = _fit_inside(w, h, target_w, target_h)
+    return (w // factor) * (h // factor) * 4 + fit_w * fit_h * 3
+
+def estimate_ffmpeg_bytes(target_w, target_h):
+    return int(target_w * target_h * 1.5 * FFMPEG_FRAME_BUFFERS)
+
+class MemoryBudget:
+    """Byte budget shared by decode workers. acquire() blocks until enough of the budget is free; a limit of 0 means unlimited."""
+    def __init__(self, limit_bytes):
+        self.limit_bytes, self.in_use = limit_bytes, 0
+        self._cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def acquire(self, nbytes):
+        if self.limit_bytes and nbytes > self.limit_bytes: raise MemoryError(f"Needs {nbytes / 2**20:.0f} MB, memory limit is {self.limit_bytes / 2**20:.0f} MB.")
+        with self._cond:
+            while self.limit_bytes and self.in_use + nbytes > self.limit_bytes: self._cond.wait()
+            self.in_use += nbytes
+        try: yield
+        finally:
+            with self._cond: self.in_use -= nbytes; self._cond.notify_all()
+
+def _proxy_cache_path(path, tag, suffix):
+    st = os.stat(path)
+    key = hashlib.sha1(f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}|{tag}".encode('utf-8')).hexdigest()
+    return PROXY_CACHE_DIR / f"{key}{suffix}"
+
+def convert_to_srgb(img, icc_profile):
+    """Converts a BGR image from its embedded RGB ICC profile to sRGB. Needs Pillow; without it the image is returned unchanged."""
+    if ImageCms is None:
+        logging.warning("Pillow is not installed, wide-gamut images are encoded without sRGB conversion.")
+        return img
+    try:
+        rgb = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        rgb = ImageCms.profileToProfile(rgb, ImageCms.ImageCmsProfile(io.BytesIO(icc_profile)), ImageCms.createProfile('sRGB'), outputMode='RGB')
+        return cv2.cvtColor(numpy.asarray(rgb), cv2.COLOR_RGB2BGR)
+    except (ImageCms.PyCMSError, OSError, ValueError) as e:
+        logging.warning(f"Could not convert ICC profile to sRGB ({e}), using the image as is.")
+        return img
+
+def create_normalized_proxy(path, w, h, target_w, target_h, icc_profile=None):
+    """Decodes path upright (cv2 applies the EXIF orientation), at reduced resolution when possible, converts icc_profile to sRGB,
+    resizes it to fit target_w x target_h and caches the result by path and mtime. Returns the proxy path."""
+    suffix = '.jpg' if path.lower().endswith(('.jpg', '.jpeg')) else '.png'
+    proxy_path = _proxy_cache_path(path, f"fit{target_w}x{target_h}{'-srgb' if icc_profile else ''}", suffix)
+    if proxy_path.exists(): os.utime(proxy_path); return str(proxy_path)
+    factor = _reduced_decode_factor(path, w, h, target_w, target_h)
+    img = cv2.imread(path, CV2_REDUCED_DECODE_FLAGS[factor])
+    if img is None: raise ValueError(f"Could not decode {path}")
+    fit_w, fit_h = _fit_inside(img.shape[1], img.shape[0], target_w, target_h)
+    if (fit_w, fit_h) != (img.shape[1], img.shape[0]): img = cv2.resize(img, (fit_w, fit_h), interpolation=cv2.INTER_AREA)
+    if icc_profile: img = convert_to_srgb(img, icc_profile)
+    PROXY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = proxy_path.with_name(f"{proxy_path.stem}.{os.getpid()}.{threading.get_ident()}{suffix}")
+    params = [cv2.IMWRITE_JPEG_QUALITY, 95] if suffix == '.jpg' else [cv2.IMWRITE_PNG_COMPRESSION, 1]
+    if not cv2.imwrite(str(tmp_path), img, params): raise OSError(f"Could not write proxy {tmp_path}")
+    os.replace(tmp_path, proxy_path)
+    return str(proxy_path)
+
+_proxies_in_use = collections.Counter() # Proxy path -> renders still reading it (see release_proxies); never pruned.
+_proxies_in_use_lock = threading.Lock()
+
+def release_proxies(paths):
+    """Ends a render's hold on the proxies prepare_input_images returned (other paths are ignored) and trims the cache."""
+    with _proxies_in_use_lock:
+        for path in paths:
+            if path not in _proxies_in_use: continue
+            _proxies_in_use[path] -= 1
+            if _proxies_in_use[path] <= 0: del _proxies_in_use[path]
+    prune_proxy_cache()
+
+def prune_proxy_cache(max_bytes=PROXY_CACHE_MAX_BYTES):
+    with _proxies_in_use_lock: in_use = set(_proxies_in_use)
+    try: entries = [(p.stat().st_mtime, p.stat().st_size, p) for p in PROXY_CACHE_DIR.iterdir() if p.is_file() and str(p) not in in_use]
+    except FileNotFoundError: return
+    total = sum(size for _, size, _ in entries)
+    for _, size, p in sorted(entries):
+        if total <= max_bytes: break
+        try: p.unlink(); total -= size
+        except OSError: pass
+
+def prepare_input_images(input_files, target_w, target_h, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, min_pixels=LARGE_IMAGE_MIN_PIXELS, progress_callback=None, cancel_event=None, skip=(), ffmpeg_bytes=None):
+    """Ingest normalization. Replaces inputs (detected from headers) with cached proxies where FFmpeg would otherwise render them
+    wrong or wastefully: EXIF-rotated photos are stored upright, wide-gamut profiles are converted to sRGB and oversize images are
+    downscaled to the target size (rotated or wide-gamut ones at any size), so neither this process nor FFmpeg holds full-resolution
+    frames. Decodes run in parallel within memory_limit_mb. Returns the new file list. Indices in skip (e.g. animations) are passed
+    through; ffmpeg_bytes overrides the FFmpeg estimate (e.g. for several outputs). The returned proxies stay out of cache pruning
+    until the caller passes the list to release_proxies() after FFmpeg has read them."""
+    limit_bytes = memory_limit_mb * 2**20 if memory_limit_mb else 0
+    if ffmpeg_bytes is None: ffmpeg_bytes = estimate_ffmpeg_bytes(target_w, target_h)
+    if limit_bytes and ffmpeg_bytes > limit_bytes:
+        raise MemoryError(f"Output {target_w}x{target_h} (all encodes) needs about {ffmpeg_bytes / 2**20:.0f} MB in FFmpeg, above the {memory_limit_mb} MB memory limit.")
+    budget = MemoryBudget(limit_bytes - ffmpeg_bytes if limit_bytes else 0)
+    jobs = {}
+    metadata = read_images_metadata([None if index in skip else path for index, path in enumerate(input_files)])
+    for index, (path, meta) in enumerate(zip(input_files, metadata)):
+        if not meta: continue
+        w, h, _, icc_profile = meta
+        oversize = w > target_w or h > target_h
+        if oversize and (w * h >= min_pixels or needs_normalization(meta)): jobs[index] = (path, w, h, target_w, target_h, icc_profile)
+        elif needs_normalization(meta): jobs[index] = (path, w, h, w, h, icc_profile) # Already fits, kept at full size.
+    if not jobs: return list(input_files)
+    logging.info(f"{len(jobs)} image(s) will be normalized (rotation, sRGB, or downscale to fit {target_w}x{target_h}).")
+    def make_proxy(item):
+        path, w, h, fit_w, fit_h, icc_profile = item
+        if cancel_event and cancel_event.is_set(): raise InterruptedError("Cancelled")
+        with budget.acquire(estimate_decode_bytes(path, w, h, fit_w, fit_h)): return create_normalized_proxy(path, w, h, fit_w, fit_h, icc_profile)
+    result, held = list(input_files), []
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as pool:
+            futures = {pool.submit(make_proxy, item): index for index, item in jobs.items()}
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                index = futures[future]
+                result[index] = future.result()
+                with _proxies_in_use_lock: _proxies_in_use[result[index]] += 1
+                held.append(result[index])
+                logging.info(f"Normalized image {input_files[index]} -> {result[index]}")
+                if progress_callback: progress_callback(f"Preparing images {done}/{len(jobs)}...")
+    except BaseException:
+        release_proxies(held); raise
+    return result
+
+def _escape_path_for_concat(path_str):
+    replacement = "'\\''"
+    escaped_inner = path_str.replace("'", replacement)
+    return f"'{escaped_inner}'"
+
+def _codec_encoder_args(codec, threads=None):
+    """Encoder tuning flags; threads caps the encoder's worker threads (settings['threads'], unset means FFmpeg's default)."""
+    thread_args = ['-threads', str(threads)] if threads else []
+    if codec == 'libvpx-vp9': return ['-speed', '1', '-tile-columns', '2', '-auto-alt-ref', '1', '-lag-in-frames', '25'] + thread_args
+    elif codec == 'libx264': return ['-preset', 'medium'] + thread_args
+    elif codec == 'libaom-av1': return ['-cpu-used', '4', '-row-mt', '1', '-tile-columns', '2', '-tile-rows', '2'] + thread_args
+    return thread_args
+
+def _ffmpeg_input(input_files, settings):
+    """FFmpeg input arguments plus the temp concat manifest path. In mosaic mode there is no manifest (None): composed frames
+    arrive as raw yuv420p on stdin (see feed_mosaic_frames), one per milliseconds_per_image. cv2's BGR->I420 conversion is
+    limited-range BT.601 (black is Y=16, white Y=235), which is what FFmpeg assumes for plain yuv420p, so no range conversion happens."""
+    if settings.get('mosaic'):
+        return ['-f', 'rawvideo', '-pix_fmt', 'yuv420p', '-s', f"{settings['target_width']}x{settings['target_height']}",
+                '-framerate', f"1000/{settings['milliseconds_per_image']}", '-i', 'pipe:0'], None
+    concat_path = write_concat_manifest(input_files, settings)
+    return ['-f', 'concat', '-safe', '0', '-i', concat_path], concat_path
+
+def _scale_pad_filter(W, H):
+    return f"scale={W}:{H}:force_original_aspect_ratio=decrease,pad={W}:{H}:(ow-iw)/2:(oh-ih)/2:color=black,format=pix_fmts=yuv420p"
+
+def write_concat_manifest(input_files, settings):
+    """Writes a temporary concat demuxer file and returns its path. This is the second pass of a render: validate_inputs has
+    already streamed every header through a bounded window and raised for bad inputs, so no file is opened here and nothing
+    is written for a list that would fail. Animated inputs (settings['animations'] from validate_inputs) get their native
+    total duration; FFmpeg's own demuxer then decodes their frames lazily with native timestamps, so nothing is extracted to disk."""
+    duration_sec = settings['milliseconds_per_image'] / 1000.0
+    animations = settings.get('animations') or {}
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as f:
+        logging.info(f"Generating concat file: {f.name}")
+        for index, img_path in enumerate(input_files):
+            frame_durations = animations.get(index)
+            f.write(f"file {_escape_path_for_concat(img_path)}\n")
+            f.write(f"duration {round(sum(frame_durations), 6) if frame_durations else duration_sec}\n")
+        # A still last image is repeated so its duration is honoured; repeating an animation would replay it.
+        if input_files and not animations.get(len(input_files) - 1): f.write(f"file {_escape_path_for_concat(input_files[-1])}\n")
+    return f.name
+
+def build_ffmpeg_concat_command(ffmpeg_executable, input_files, settings, output_file, metrics=None):
+    """Writes a temporary concat demuxer file for input_files and returns (ffmpeg_cmd, concat_path).
+    settings uses the keys produced by ImagesToVideoSlideshow._validate_and_get_settings."""
+    input_args, concat_path = _ffmpeg_input(input_files, settings)
+    W, H = settings['target_width'], settings['target_height']
+    cmd = [
+        ffmpeg_executable, '-y', *input_args,
+        '-vf', _scale_pad_filter(W, H), '-c:v', settings['codec'], '-crf', str(settings['crf']),
+        '-progress', '-',
+    ]
+    cmd.extend(_codec_encoder_args(settings['codec'], settings.get('threads')))
+    if metrics: cmd.extend(metrics.ffmpeg_args())
+    cmd.append(output_file)
+    return cmd, concat_path
+
+CODEC_SHORT_NAMES = {'libx264': 'h264', 'libvpx-vp9': 'vp9', 'libaom-av1': 'av1'}
+CODEC_MAX_CRF = {'libvpx-vp9': 63, 'libaom-av1': 63, 'libx264': 51}
+
+def equivalent_crf(crf, from_codec, to_codec):
+    """Maps a CRF onto another codec's scale proportionally, e.g. VP9 36 (of 63) -> H.264 29 (of 51)."""
+    return round(crf * CODEC_MAX_CRF.get(to_codec, 51) / CODEC_MAX_CRF.get(from_codec, 51))
+
+def parse_output_heights(text):
+    """Parses "720, 480" into [720, 480]. Raises ValueError for anything that is not a positive integer."""
+    heights = []
+    for part in text.replace(';', ',').split(','):
+        if not part.strip(): continue
+        try: height = int(part.strip().lower().removesuffix('p'))
+        except ValueError: height = 0
+        if height <= 0: raise ValueError(f"Invalid output height: {part.strip()}")
+        heights.append(height)
+    return heights
+
+def plan_output_variants(primary_profile, extra_profiles, base_w, base_h, extra_heights, crf):
+    """Every (resolution, profile) output for one render, primary first. Extra heights at or above base_h are ignored.
+    Other codecs get an equivalent CRF on their own scale."""
+    primary_codec = OUTPUT_PROFILES[primary_profile]['codec']
+    profiles = [primary_profile] + [p for p in extra_profiles if p != primary_profile and p in OUTPUT_PROFILES]
+    sizes = [(base_w, base_h, '')]
+    for height in sorted(set(extra_heights), reverse=True):
+        if height >= base_h: logging.warning(f"Ignoring extra output height {height}: not below {base_h}."); continue
+        sizes.append((_even(base_w * height / base_h), _even(height), f"_{_even(height)}p"))
+    variants = []
+    for w, h, size_suffix in sizes:
+        for profile_str in profiles:
+            data = OUTPUT_PROFILES[profile_str]
+            codec_suffix = '' if profile_str == primary_profile else f"_{CODEC_SHORT_NAMES.get(data['codec'], 'video')}"
+            variants.append({'profile_str': profile_str, 'codec': data['codec'], 'container': data['container'],
+                             'crf': crf if data['codec'] == primary_codec else equivalent_crf(crf, primary_codec, data['codec']),
+                             'width': w, 'height': h, 'suffix': codec_suffix + size_suffix})
+    return variants
+
+def output_path_for_variant(primary_output, variant):
+    root, _ = os.path.splitext(primary_output)
+    return primary_output if not variant['suffix'] else f"{root}{variant['suffix']}{variant['container']}"
+
+def build_ffmpeg_multi_output_command(ffmpeg_executable, input_files, settings, outputs, metrics=None):
+    """Like build_ffmpeg_concat_command, but decodes and scales once and feeds every output's encoder through split.
+    outputs are plan_output_variants() entries with an added 'output_file'; the first one must match the settings target size."""
+    input_args, concat_path = _ffmpeg_input(input_files, settings)
+    W, H = settings['target_width'], settings['target_height']
+    groups = {}
+    for index, output in enumerate(outputs): groups.setdefault((output['width'], output['height']), []).append(index)
+    graph = [f"[0:v]{_scale_pad_filter(W, H)},split={len(groups)}" + "".join(f"[r{r}]" for r in range(len(groups)))]
+    for r, ((w, h), indices) in enumerate(groups.items()):
+        source = f"[r{r}]"
+        if (w, h) != (W, H): graph.append(f"{source}scale={w}:{h}[r{r}s]"); source = f"[r{r}s]"
+        graph.append(f"{source}split={len(indices)}" + "".join(f"[o{i}]" for i in indices))
+    cmd = [ffmpeg_executable, '-y', *input_args, '-filter_complex', ";".join(graph), '-progress', '-']
+    if metrics: cmd.extend(metrics.ffmpeg_args())
+    for index, output in enumerate(outputs):
+        cmd.extend(['-map', f"[o{index}]", '-c:v', output['codec'], '-crf', str(output['crf'])])
+        cmd.extend(_codec_encoder_args(output['codec'], settings.get('threads')))
+        cmd.append(output['output_file'])
+    return cmd, concat_path
+
+STREAMING_FORMATS = {"Single file": None, "HLS (.m3u8)": 'hls', "DASH (.mpd)": 'dash'}
+STREAMING_MANIFEST_EXTENSIONS = {'hls': '.m3u8', 'dash': '.mpd'}
+STREAMING_SEGMENT_TARGET_SEC = 6.0
+
+def streaming_segment_duration(duration_sec):
+    """Segment length rounded to whole images, so every segment starts exactly on an image boundary."""
+    return duration_sec * max(1, round(STREAMING_SEGMENT_TARGET_SEC / duration_sec))
+
+def streaming_output_patterns(manifest_path, streaming_format):
+    """Glob patterns (relative to the manifest's folder) matching the files build_ffmpeg_streaming_command makes FFmpeg write."""
+    name, stem = glob.escape(Path(manifest_path).name), glob.escape(Path(manifest_path).stem)
+    if streaming_format == 'hls': return [name, f"{stem}_*p.m3u8", f"{stem}_*p_init.mp4", f"{stem}_*p_[0-9][0-9][0-9][0-9][0-9]*.m4s"]
+    return [name, f"{stem}_init_*.*", f"{stem}_chunk_*_[0-9][0-9][0-9][0-9][0-9]*.*"]
+
+def snapshot_render_outputs(output_file, output_files, streaming_format=None):
+    """{path: mtime_ns} of the render's output files that already exist; remove_render_outputs leaves these alone unless FFmpeg rewrote them."""
+    if streaming_format:
+        out_dir = Path(output_file).parent
+        output_files = [str(p) for pattern in streaming_output_patterns(output_file, streaming_format) for p in out_dir.glob(pattern)]
+    snapshot = {}
+    for path in output_files:
+        with contextlib.suppress(OSError): snapshot[str(path)] = os.stat(path).st_mtime_ns
+    return snapshot
+
+def build_ffmpeg_streaming_command(ffmpeg_executable, input_files, settings, renditions, manifest_path, streaming_format, metrics=None):
+    """HLS (fragmented MP4) or DASH (fragmented MP4/WebM) output with one rendition per renditions entry (plan_output_variants
+    entries, largest first). Keyframes are forced at every image start and segments span whole images, so seeking is cheap."""
+    duration_sec = settings['milliseconds_per_image'] / 1000.0
+    input_args, concat_path = _ffmpeg_input(input_files, settings)
+    W, H = settings['target_width'], settings['target_height']
+    graph = [f"[0:v]{_scale_pad_filter(W, H)},split={len(renditions)}" + "".join(f"[r{i}]" for i in range(len(renditions)))]
+    maps = []
+    for i, rendition in enumerate(renditions):
+        if (rendition['width'], rendition['height']) == (W, H): maps.append(f"[r{i}]"); continue
+        graph.append(f"[r{i}]scale={rendition['width']}:{rendition['height']}[r{i}s]"); maps.append(f"[r{i}s]")
+    codec = renditions[0]['codec']
+    cmd = [ffmpeg_executable, '-y', *input_args, '-filter_complex', ";".join(graph), '-progress', '-']
+    if metrics: cmd.extend(metrics.ffmpeg_args())
+    for label in maps: cmd.extend(['-map', label])
+    cmd.extend(['-c:v', codec, '-crf', str(renditions[0]['crf'])])
+    cmd.extend(_codec_encoder_args(codec, settings.get('threads')))
+    cmd.extend(['-force_key_frames', f"expr:{start_crossing_expr(sorted(set(image_start_times(input_files, settings))))}"])
+    segment_sec = streaming_segment_duration(duration_sec)
+    out_dir, stem = Path(manifest_path).parent, Path(manifest_path).stem
+    if streaming_format == 'hls':
+        stream_map = " ".join(f"v:{i},name:{r['height']}p" for i, r in enumerate(renditions))
+        cmd.extend(['-f', 'hls', '-hls_time', f"{segment_sec:g}", '-hls_playlist_type', 'vod', '-hls_segment_type', 'fmp4',
+                    '-hls_flags', 'independent_segments', '-hls_fmp4_init_filename', f"{stem}_%v_init.mp4",
+                    '-hls_segment_filename', str(out_dir / f"{stem}_%v_%05d.m4s"),
+                    '-master_pl_name', Path(manifest_path).name, '-var_stream_map', stream_map, str(out_dir / f"{stem}_%v.m3u8")])
+    elif streaming_format == 'dash':
+        cmd.extend(['-f', 'dash', '-seg_duration', f"{segment_sec:g}", '-use_template', '1', '-use_timeline', '1',
+                    '-adaptation_sets', "id=0,streams=v", '-init_seg_name', f"{stem}_init_$RepresentationID$.$ext$",
+                    '-media_seg_name', f"{stem}_chunk_$RepresentationID$_$Number%05d$.$ext$", str(manifest_path)])
+    else: raise ValueError(f"Unknown streaming format: {streaming_format}")
+    return cmd, concat_path
+
+MOSAIC_GRIDS = {"Off": None, "2x2": (2, 2), "3x3": (3, 3), "4x4": (4, 4), "6x6": (6, 6)}
+MOSAIC_MIN_TILE_PIXELS = 16
+MOSAIC_LOOKAHEAD_FRAMES = 2 # Frames composed ahead beyond one per worker, i.e. frame pool slots = workers + this.
+
+def _load_fitted_image(path, box_w, box_h, out=None):
+    """Decodes path upright (at reduced JPEG resolution when possible), converts it to sRGB and scales it up or down to fit box_w x box_h.
+    With out (a box_h x box_w x 3 array or view), the result is resized straight into its centre and that sub-view is returned."""
+    try: w, h, _, icc_profile = read_image_metadata(path)
+    except (OSError, ValueError): w = h = icc_profile = None
+    img = cv2.imread(path, CV2_REDUCED_DECODE_FLAGS[_reduced_decode_factor(path, w, h, box_w, box_h) if w else 1])
+    if img is None: raise ValueError(f"Could not decode {path}")
+    if icc_profile: img = convert_to_srgb(img, icc_profile)
+    scale = min(box_w / img.shape[1], box_h / img.shape[0])
+    fit_w, fit_h = max(1, min(box_w, round(img.shape[1] * scale))), max(1, min(box_h, round(img.shape[0] * scale)))
+    dst = None
+    if out is not None:
+        y, x = (box_h - fit_h) // 2, (box_w - fit_w) // 2
+        dst = out[y:y + fit_h, x:x + fit_w]
+    if (fit_w, fit_h) == (img.shape[1], img.shape[0]):
+        if dst is None: return img
+        dst[...] = img; return dst
+    return cv2.resize(img, (fit_w, fit_h), dst=dst, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+class SharedFramePool:
+    """A fixed set of equally sized frame buffers in one shared memory block. Worker processes attach by name and write frames
+    in place; the owner hands slots to FFmpeg as memoryviews, so frames are never copied or reallocated in Python."""
+    def __init__(self, frame_bytes, slots):
+        self.frame_bytes, self.slots = frame_bytes, slots
+        self.shm = shared_memory.SharedMemory(create=True, size=frame_bytes * slots)
+        self.name = self.shm.name
+
+    def view(self, slot):
+        """Memoryview of one slot. Release it (use it as a context manager) before close()."""
+        return self.shm.buf[slot * self.frame_bytes:(slot + 1) * self.frame_bytes]
+
+    def close(self):
+        self.shm.close()
+        with contextlib.suppress(FileNotFoundError): self.shm.unlink()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc_info): self.close()
+
+_mosaic_worker_buffers = {} # Per worker process: the attached frame pool and one reusable BGR canvas.
+
+def _close_mosaic_worker_pool():
+    if shm := _mosaic_worker_buffers.pop('shm', None): shm.close()
+    _mosaic_worker_buffers.pop('name', None)
+
+def _compose_mosaic_frame(pool_name, offset, paths, width, height, cols, rows):
+    """Process pool worker: resizes each tile straight into its cell of the worker's BGR canvas, then converts the canvas into the
+    shared pool slot at offset as limited-range yuv420p (I420). Tiles that fail to decode are left black; returns their
+    (path, error) pairs so the parent process can log them. The attached pool is closed when the worker exits."""
+    if _mosaic_worker_buffers.get('name') != pool_name:
+        if 'shm' not in _mosaic_worker_buffers: multiprocessing.util.Finalize(None, _close_mosaic_worker_pool, exitpriority=10)
+        _close_mosaic_worker_pool()
+        _mosaic_worker_buffers.update(name=pool_name, shm=shared_memory.SharedMemory(name=pool_name))
+    if _mosaic_worker_buffers.get('canvas', numpy.empty(0)).shape != (height, width, 3):
+        _mosaic_worker_buffers['canvas'] = numpy.empty((height, width, 3), numpy.uint8)
+    canvas, tile_w, tile_h = _mosaic_worker_buffers['canvas'], width // cols, height // rows
+    canvas.fill(0); failed = []
+    for cell, path in enumerate(paths):
+        y, x = (cell // cols) * tile_h, (cell % cols) * tile_w
+        try: _load_fitted_image(path, tile_w, tile_h, out=canvas[y:y + tile_h, x:x + tile_w])
+        except Exception as e: failed.append((path, str(e) or type(e).__name__))
+    frame = numpy.ndarray((height * 3 // 2, width), numpy.uint8, buffer=_mosaic_worker_buffers['shm'].buf, offset=offset)
+    cv2.cvtColor(canvas, cv2.COLOR_BGR2YUV_I420, dst=frame)
+    del frame # A live export of shm.buf would make the exit-time close() fail.
+    return failed
+
+def iter_mosaic_frames(input_files, width, height, cols, rows, workers=None, cancel_event=None):
+    """Yields the yuv420p frames (limited range, see _ffmpeg_input) holding cols x rows images each, in input order, as memoryviews
+    into a SharedFramePool. Frames are composed by a process pool a few frames ahead; a slot is reused as soon as the caller
+    asks for the next frame, so memory stays flat however many images there are. width and height must be even."""
+    per_frame, frame_bytes = cols * rows, width * height * 3 // 2
+    batches = [input_files[i:i + per_frame] for i in range(0, len(input_files), per_frame)]
+    if not batches: return
+    workers = min(workers or os.cpu_count() or 1, len(batches))
+    pending = collections.deque()
+    with SharedFramePool(frame_bytes, min(len(batches), workers + MOSAIC_LOOKAHEAD_FRAMES)) as frames, \
+         concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=cv2.setNumThreads, initargs=(1,)) as pool:
+        batches = iter(batches)
+        def submit(slot):
+            if (batch := next(batches, None)): pending.append((slot, pool.submit(_compose_mosaic_frame, frames.name, slot * frame_bytes, batch, width, height, cols, rows)))
+        try:
+            for slot in range(frames.slots): submit(slot)
+            while pending:
+                slot, future = pending.popleft()
+                if cancel_event and cancel_event.is_set(): raise InterruptedError("Cancelled")
+                for path, error in future.result(): logging.warning(f"Mosaic: leaving tile for '{path}' empty: {error}")
+                with frames.view(slot) as view: yield view
+                submit(slot)
+        finally:
+            for _, future in pending: future.cancel()
+            pool.shutdown(wait=True, cancel_futures=True) # Workers must be done writing before the block is unmapped.
+
+def feed_mosaic_frames(process, input_files, settings, cancel_event=None):
+    """Writes the mosaic frames for settings into process.stdin and closes it. Meant for its own thread while the caller reads
+    FFmpeg's stderr; if FFmpeg exits early, writing stops quietly and its stderr explains why."""
+    cols, rows = settings['mosaic']
+    try:
+        for frame in iter_mosaic_frames(input_files, settings['target_width'], settings['target_height'], cols, rows, cancel_event=cancel_event):
+            process.stdin.buffer.write(frame)
+    except (BrokenPipeError, InterruptedError, ValueError, OSError): pass
+    except Exception: logging.exception("Mosaic frame feeder failed:")
+    finally:
+        with contextlib.suppress(OSError, ValueError): process.stdin.close()
+
+def start_mosaic_feeder(process, input_files, settings, cancel_event=None):
+    thread = threading.Thread(target=feed_mosaic_frames, args=(process, input_files, settings, cancel_event), name="mosaic-feeder", daemon=True)
+    thread.start()
+    return thread
+
+QUALITY_MIN_SSIM = 0.92 # Luma SSIM below this flags an image as visibly degraded.
+QUALITY_CRF_STEP = 4
+QUALITY_PSNR_CAP = 100.0 # cv2.PSNR is unbounded for identical images; capped so reports stay valid JSON.
+QUALITY_FRAME_TOLERANCE_SEC = 0.002 # Timestamp rounding; a frame this close before an image start already shows that image.
+QUALITY_RUNS_PER_PASS = 64 # Irregular start-time runs per decode pass, keeps the select expression well below command line limits.
+SHOWINFO_PTS_TIME_RE = re.compile(r'Parsed_showinfo.*\bpts_time:\s*(-?[\d.]+)')
+
+def image_start_times(input_files, settings):
+    """Output timestamp (seconds) at which each input first appears: its slot start, or the start of the mosaic sheet holding it.
+    An animation starts with its first frame, the only frame a still reference can match."""
+    slot = settings['milliseconds_per_image'] / 1000.0
+    if settings.get('mosaic'):
+        per_frame = settings['mosaic'][0] * settings['mosaic'][1]
+        return [(index // per_frame) * slot for index in range(len(input_files))]
+    animations = settings.get('animations') or {}
+    times, start = [], 0.0
+    for index in range(len(input_files)):
+        times.append(start)
+        durations = animations.get(index)
+        start += round(sum(durations), 6) if durations else slot
+    return times
+
+def _arithmetic_runs(times):
+    """Splits sorted, distinct times into (first, step, count) runs of equal spacing."""
+    runs = []
+    for t in times:
+        if runs and runs[-1][2] == 1: runs[-1] = (runs[-1][0], t - runs[-1][0], 2)
+        elif runs and abs(runs[-1][0] + runs[-1][1] * runs[-1][2] - t) < 1e-6: runs[-1] = (runs[-1][0], runs[-1][1], runs[-1][2] + 1)
+        else: runs.append((t, 0.0, 1))
+    return runs
+
+def _start_count_expr(runs, offsets, lo, hi):
+    """FFmpeg expression for how many run starts are <= ld(0), as a binary search over runs[lo:hi] (assumes ld(0) >= runs[lo] start)."""
+    if hi - lo == 1:
+        first, step, count = runs[lo]
+        if count == 1: return str(offsets[lo] + 1)
+        return f"{offsets[lo]}+min({count},floor((ld(0)-{first:.6f})/{step:.6f})+1)"
+    mid = (lo + hi) // 2
+    return f"if(lt(ld(0),{runs[mid][0]:.6f}),{_start_count_expr(runs, offsets, lo, mid)},{_start_count_expr(runs, offsets, mid, hi)})"
+
+def start_crossing_expr(times, tolerance=QUALITY_FRAME_TOLERANCE_SEC):
+    """select filter (or -force_key_frames expr:) expression true for the first frame at or after each of the sorted, distinct times. Equally spaced
+    times collapse into one arithmetic run, so a plain slideshow needs a constant-size expression however many images it has.
+    Works for constant (mp4) and variable (webm) frame rate output alike."""
+    runs = _arithmetic_runs(times)
+    offsets = list(itertools.accumulate((count for _, _, count in runs), initial=0))
+    count = f"if(lt(ld(0),{runs[0][0]:.6f}),0,{_start_count_expr(runs, offsets, 0, len(runs))})"
+    return f"st(0,t+{tolerance});st(1,{count});st(2,gt(ld(1),ld(3)));st(3,ld(1));ld(2)"
+
+def _quality_reference(path, index, settings):
+    """The ideal (unencoded) content for input index and its top-left position in the output frame."""
+    W, H = settings['target_width'], settings['target_height']
+    if not settings.get('mosaic'):
+        img = _load_fitted_image(path, W, H)
+        return img, ((W - img.shape[1]) // 2, (H - img.shape[0]) // 2)
+    cols, rows = settings['mosaic']
+    tile_w, tile_h, cell = W // cols, H // rows, index % (cols * rows)
+    img = _load_fitted_image(path, tile_w, tile_h)
+    return img, ((cell % cols) * tile_w + (tile_w - img.shape[1]) // 2, (cell // cols) * tile_h + (tile_h - img.shape[0]) // 2)
+
+def iter_video_frames_at(ffmpeg_executable, video_file, times, width, height, cancel_event=None):
+    """Decodes video_file once and yields (time_sec, frame) for the first frame at or after each of the sorted, distinct times, as
+    width x height BGR arrays. Frame times come from showinfo; a time covered by no frame (shorter than one frame) yields nothing.
+    Runs of irregular times are split over several passes to keep each select expression short."""
+    frame_bytes = width * height * 3
+    flags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0
+    runs = _arithmetic_runs(times)
+    for first in range(0, len(runs), QUALITY_RUNS_PER_PASS):
+        chunk = runs[first:first + QUALITY_RUNS_PER_PASS]
+        chunk_times = [run[0] + run[1] * i for run in chunk for i in range(run[2])]
+        seek = ['-ss', f"{max(0.0, chunk[0][0] - 1):.3f}", '-copyts'] if first else []
+        cmd = [ffmpeg_executable, '-hide_banner', '-nostats', *seek, '-i', video_file, '-an', '-sn',
+               '-vf', f"select='{start_crossing_expr(chunk_times)}',showinfo", '-frames:v', str(len(chunk_times)),
+               '-fps_mode', 'passthrough', '-s', f"{width}x{height}", '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1']
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=flags)
+        frame_times, tail = queue.Queue(), collections.deque(maxlen=5)
+        def read_stderr():
+            for line in iter(process.stderr.readline, b''):
+                line = line.decode('utf-8', 'replace')
+                if (match := SHOWINFO_PTS_TIME_RE.search(line)): frame_times.put(float(match.group(1)))
+                else: tail.append(line.strip())
+            frame_times.put(None)
+        reader = threading.Thread(target=read_stderr, name="quality-stderr", daemon=True)
+        reader.start()
+        try:
+            while len(data := process.stdout.read(frame_bytes)) == frame_bytes:
+                if cancel_event and cancel_event.is_set(): raise InterruptedError("Cancelled")
+                time_sec = frame_times.get()
+                if time_sec is None: break
+                yield time_sec, numpy.frombuffer(data, numpy.uint8).reshape(height, width, 3)
+        finally:
+            if process.poll() is None: process.kill()
+            process.stdout.close(); process.wait(); reader.join(timeout=5); process.stderr.close()
+        if process.returncode > 0: raise ValueError(f"Could not decode {video_file}: {' '.join(tail)[-300:]}")
+
+def structural_similarity(a, b):
+    """Mean SSIM of the luma planes of two equally sized BGR images (11x11 Gaussian window, sigma 1.5)."""
+    a, b = (cv2.cvtColor(img, cv2.COLOR_BGR2GRAY).astype(numpy.float32) for img in (a, b))
+    blur = lambda img: cv2.GaussianBlur(img, (11, 11), 1.5)
+    mu_a, mu_b = blur(a), blur(b)
+    var_a, var_b, covariance = blur(a * a) - mu_a * mu_a, blur(b * b) - mu_b * mu_b, blur(a * b) - mu_a * mu_b
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    ssim = ((2 * mu_a * mu_b + c1) * (2 * covariance + c2)) / ((mu_a * mu_a + mu_b * mu_b + c1) * (var_a + var_b + c2))
+    return float(ssim.mean())
+
+def _measure_frame_quality(task):
+    """Process pool worker: compares the inputs shown in one decoded frame with their references. Never raises, errors are reported."""
+    frame, items, time_sec, settings = task
+    results = []
+    for index, path in items:
+        result = {'index': index, 'path': path, 'time_sec': round(time_sec, 3)}
+        try:
+            reference, (x, y) = _quality_reference(path, index, settings)
+            encoded = frame[y:y + reference.shape[0], x:x + reference.shape[1]]
+            result['ssim'] = round(structural_similarity(reference, encoded), 4)
+            result['psnr'] = round(min(cv2.PSNR(reference, encoded), QUALITY_PSNR_CAP), 2)
+        except Exception as e: result['error'] = str(e)
+        results.append(result)
+    return results
+
+def verify_render_quality(ffmpeg_executable, video_file, input_files, settings, workers=None, cancel_event=None, progress_callback=None, min_ssim=QUALITY_MIN_SSIM):
+    """Post-encode check of video_file (the primary output, target size) against its sources. The video is decoded in one pass
+    that keeps only the first frame of each image (see iter_video_frames_at); each frame is compared with the scaled sources it
+    shows (SSIM, PSNR) in a process pool, so the NumPy work runs on every core. Returns the report dict (see
+    write_quality_report); images below min_ssim are listed under 'flagged' with a suggested lower CRF.
+    Raises InterruptedError when cancel_event is set."""
+    W, H = settings['target_width'], settings['target_height']
+    starts = image_start_times(input_files, settings)
+    times = sorted(set(starts))
+    by_start = collections.defaultdict(list)
+    for index, (path, start) in enumerate(zip(input_files, starts)): by_start[start].append((index, path))
+    results, pending, next_start = [None] * len(input_files), collections.deque(), 0
+    workers = min(workers or os.cpu_count() or 1, max(1, len(times)))
+    def collect(future):
+        for result in future.result(): results[result['index']] = result
+        done = sum(r is not None for r in results)
+        if progress_callback: progress_callback(f"Verifying quality: {done}/{len(results)} images...")
+    # Spawned workers re-import this module only; forking a process that runs Tk and encoder threads is not safe.
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        try:
+            for time_sec, frame in iter_video_frames_at(ffmpeg_executable, video_file, times, W, H, cancel_event):
+                reached = []
+                while next_start < len(times) and times[next_start] <= time_sec + QUALITY_FRAME_TOLERANCE_SEC:
+                    reached.append(times[next_start]); next_start += 1
+                if not reached: continue
+                # The frame shows the latest image that started by now; earlier ones in between were shorter than one frame.
+                for skipped in reached[:-1]:
+                    for index, path in by_start[skipped]: results[index] = {'index': index, 'path': path, 'error': "Not shown: shorter than one video frame"}
+                pending.append(pool.submit(_measure_frame_quality, (frame, by_start[reached[-1]], time_sec, settings)))
+                while len(pending) > workers * 2: collect(pending.popleft())
+            while pending: collect(pending.popleft())
+        except BaseException:
+            for future in pending: future.cancel()
+            raise
+    for index, path in enumerate(input_files):
+        if results[index] is None: results[index] = {'index': index, 'path': path, 'error': "No frame decoded (video shorter than expected)"}
+    measured = [r for r in results if 'ssim' in r]
+    flagged = [r for r in measured if r['ssim'] < min_ssim]
+    for r in flagged: r['flagged'] = True
+    for r in results:
+        if 'error' in r: logging.warning(f"Quality check of '{r['path']}' failed: {r['error']}")
+    return {'video': video_file, 'codec': settings.get('codec'), 'crf': settings.get('crf'), 'min_ssim': min_ssim,
+            'images': len(results), 'measured': len(measured), 'errors': len(results) - len(measured),
+            'mean_ssim': round(statistics.fmean(r['ssim'] for r in measured), 4) if measured else None,
+            'worst_ssim': min((r['ssim'] for r in measured), default=None),
+            'mean_psnr': round(statistics.fmean(r['psnr'] for r in measured), 2) if measured else None,
+            'flagged': [r['path'] for r in flagged],
+            'suggested_crf': max(0, settings['crf'] - QUALITY_CRF_STEP) if flagged else settings['crf'],
+            'per_image': results}
+
+def write_quality_report(output_file, report):
+    """Writes <output_file>.quality.json. Returns its path."""
+    report_path = f"{output_file}.quality.json"
+    with open(report_path, 'w', encoding='utf-8') as f: json.dump(report, f, indent=4)
+    logging.info(f"Quality report written: {report_path} (mean SSIM {report['mean_ssim']}, {len(report['flagged'])} flagged)")
+    return report_path
+
+FFMPEG_PROGRESS_RE = re.compile(r'(frame|fps|speed)=\s*([\d.]+)')
+FFMPEG_BENCH_SUMMARY_RE = re.compile(r'bench:\s+utime=([\d.]+)s\s+stime=([\d.]+)s\s+rtime=([\d.]+)s')
+FFMPEG_BENCH_MAXRSS_RE = re.compile(r'bench:\s+maxrss=(\d+)\s*(?:KiB|kB)')
+FFMPEG_BENCH_STEP_RE = re.compile(r'bench:\s+(\d+)\s+user\s+(\d+)\s+sys\s+(\d+)\s+real\s+(\w+)')
+
+class RenderMetrics:
+    """Per-job stage timers and counters, plus figures parsed from FFmpeg's -benchmark/-benchmark_all and progress output."""
+    def __init__(self, profile=False):
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {'images': 0, 'bytes_read': 0, 'frames_encoded': 0}
+        self.ffmpeg = {'speed_last': None, 'speed_max': None, 'fps_last': None, 'steps_real_sec': {}}
+        self.profilers = [] if profile else None
+        self.status, self.exit_code = None, None # Outcome: 'done', 'failed' or 'cancelled', and FFmpeg's exit code.
+        self.command = None # FFmpeg command line, once built.
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try: yield
+        finally:
+            with self._lock: self.stages[name] = round(self.stages.get(name, 0.0) + time.perf_counter() - start, 6)
+
+    @contextlib.contextmanager
+    def profiled(self):
+        """Runs the block under cProfile when profiling is on. cProfile only sees the current thread, so each thread enters its own block."""
+        if self.profilers is None: yield; return
+        profiler = cProfile.Profile()
+        with self._lock: self.profilers.append(profiler)
+        profiler.enable()
+        try: yield
+        finally: profiler.disable()
+
+    def count(self, name, amount=1):
+        with self._lock: self.counters[name] = self.counters.get(name, 0) + amount
+
+    def parse_ffmpeg_line(self, line):
+        if line.startswith('frame='):
+            values = dict(FFMPEG_PROGRESS_RE.findall(line))
+            if 'frame' in values: self.counters['frames_encoded'] = int(float(values['frame']))
+            if 'fps' in values: self.ffmpeg['fps_last'] = float(values['fps'])
+            if 'speed' in values:
+                speed = float(values['speed'])
+                self.ffmpeg['speed_last'] = speed
+                self.ffmpeg['speed_max'] = max(speed, self.ffmpeg['speed_max'] or 0.0)
+        elif line.startswith('bench:'):
+            if m := FFMPEG_BENCH_STEP_RE.match(line):
+                steps = self.ffmpeg['steps_real_sec']
+                steps[m.group(4)] = round(steps.get(m.group(4), 0.0) + int(m.group(3)) / 1e6, 6)
+            elif m := FFMPEG_BENCH_SUMMARY_RE.match(line):
+                self.ffmpeg.update({'utime_sec': float(m.group(1)), 'stime_sec': float(m.group(2)), 'rtime_sec': float(m.group(3))})
+            elif m := FFMPEG_BENCH_MAXRSS_RE.match(line): self.ffmpeg['maxrss_kb'] = int(m.group(1))
+
+    def ffmpeg_args(self):
+        return ['-benchmark_all'] if self.profilers is not None else ['-benchmark']
+
+    def to_dict(self):
+        return {'started': datetime.datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+                'status': self.status, 'exit_code': self.exit_code, 'command': self.command,
+                'total_sec': round(time.time() - self.started, 3), 'stages_sec': dict(self.stages),
+                'counters': dict(self.counters), 'ffmpeg': self.ffmpeg}
+
+    def write(self, output_file, extra=None):
+        """Writes <output_file>.metrics.json and, when profiling, <output_file>.prof. Returns the metrics path."""
+        metrics_path = f"{output_file}.metrics.json"
+        data = self.to_dict()
+        if extra: data.update(extra)
+        with open(metrics_path, 'w', encoding='utf-8') as f: json.dump(data, f, indent=4)
+        if self.profilers:
+            pstats.Stats(*self.profilers).dump_stats(f"{output_file}.prof")
+            logging.info(f"cProfile dump written: {output_file}.prof")
+        logging.info(f"Render metrics written: {metrics_path}")
+        return metrics_path
+
+def _metrics_stage(metrics, name):
+    return metrics.stage(name) if metrics else contextlib.nullcontext()
+
+CONFIG_FILENAME = "ImagesToVideoSlideshowSettings.json"
+CONFIG_SAVE_DELAY_SEC = 0.5
+def user_config_dir(app_name="ImagesToVideoSlideshow"):
+    """Per-user settings folder that survives temp cleanups: %APPDATA% on Windows, Application Support on macOS, XDG config elsewhere."""
+    if platform.system() == "Windows" and os.environ.get('APPDATA'): return Path(os.environ['APPDATA']) / app_name
+    if platform.system() == "Darwin": return Path.home() / "Library" / "Application Support" / app_name
+    return Path(os.environ.get('XDG_CONFIG_HOME') or Path.home() / ".config") / app_name
+
+JOB_PRESETS_DIR = user_config_dir() / "Jobs"
+LEGACY_JOB_PRESETS_DIR = Path(tempfile.gettempdir()) / "ImagesToVideoSlideshowJobs" # Where earlier versions saved jobs; still read by name.
+JOB_PRESET_SUFFIX = ".json.gz"
+JOB_PRESET_VERSION = 1
+JOB_SETTING_KEYS = ('output_profile', 'quality_crf', 'time_per_image_sec', 'downscale_enabled', 'downscale_factor', 'auto_resolution',
+                    'extra_output_profiles', 'extra_output_heights', 'streaming_format', 'mosaic_grid', 'output_file_hint')
+
+def write_file_atomic(path, data):
+    """Writes bytes to a temp file next to path, fsyncs it and renames it over path, so readers see the old or the new file, never a torn one."""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data); f.flush(); os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError): os.remove(tmp_path)
+        raise
+
+class CoalescingWriter:
+    """Persists the latest of many save() calls from a background thread. Calls within delay_sec of each other collapse into one
+    atomic write; flush() writes anything pending synchronously (e.g. on exit)."""
+    def __init__(self, path, serialize, delay_sec=CONFIG_SAVE_DELAY_SEC):
+        self.path, self.serialize, self.delay_sec = path, serialize, delay_sec
+        self._cond, self._write_lock = threading.Condition(), threading.Lock()
+        self._pending, self._seq, self._written_seq, self._thread = None, 0, 0, None
+
+    def save(self, data):
+        with self._cond:
+            self._seq += 1; self._pending = (self._seq, data)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True); self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.delay_sec)
+            with self._cond:
+                pending, self._pending = self._pending, None
+                if pending is None: self._thread = None; return
+            self._write(*pending)
+
+    def _write(self, seq, data):
+        with self._write_lock:
+            if seq <= self._written_seq: return # A newer snapshot was already flushed.
+            try: write_file_atomic(self.path, self.serialize(data)); self._written_seq = seq
+            except Exception as e: logging.warning(f"Could not save '{self.path}': {e}")
+
+    def flush(self):
+        with self._cond: pending, self._pending = self._pending, None
+        if pending: self._write(*pending)
+
+def encode_file_list(paths):
+    """Compact, order-preserving form of a path list: each distinct directory is stored once and consecutive files from the same
+    directory collapse into a [directory_index, count] run, so 100k paths from a few folders cost little more than their names."""
+    dirs, dir_index, runs, names = [], {}, [], []
+    for path in paths:
+        directory, name = os.path.split(path)
+        index = dir_index.get(directory)
+        if index is None: index = dir_index[directory] = len(dirs); dirs.append(directory)
+        if runs and runs[-1][0] == index: runs[-1][1] += 1
+        else: runs.append([index, 1])
+        names.append(name)
+    return {'dirs': dirs, 'runs': runs, 'names': names}
+
+def decode_file_list(data):
+    """Inverse of encode_file_list. Raises ValueError unless every run names an existing directory and the runs cover the names exactly."""
+    dirs, names, runs = data['dirs'], data['names'], data['runs']
+    if not all(isinstance(value, list) for value in (dirs, names, runs)): raise ValueError("'dirs', 'names' and 'runs' must be lists")
+    paths, position = [], 0
+    for run in runs:
+        if not (isinstance(run, list) and len(run) == 2 and all(type(value) is int for value in run)): raise ValueError(f"Invalid run {run!r}")
+        index, count = run
+        if not (0 <= index < len(dirs)) or count < 1: raise ValueError(f"Run {run!r} is out of range for {len(dirs)} directories")
+        if position + count > len(names): raise ValueError(f"Runs cover more than the {len(names)} names")
+        paths.extend(os.path.join(dirs[index], name) for name in names[position:position + count])
+        position += count
+    if position != len(names): raise ValueError(f"Runs cover {position} of {len(names)} names")
+    return paths
+
+def job_preset_path(name, directory=JOB_PRESETS_DIR):
+    """Path of a named job preset. A name that already is a preset file path is returned unchanged."""
+    if str(name).endswith(JOB_PRESET_SUFFIX): return Path(name)
+    safe_name = re.sub(r'[^\w\- .]', '_', str(name)).strip() or 'job'
+    path = Path(directory) / f"{safe_name}{JOB_PRESET_SUFFIX}"
+    legacy_path = LEGACY_JOB_PRESETS_DIR / path.name
+    return legacy_path if directory == JOB_PRESETS_DIR and not path.exists() and legacy_path.exists() else path
+
+def list_job_presets(directory=JOB_PRESETS_DIR):
+    names = set()
+    for folder in (directory, LEGACY_JOB_PRESETS_DIR) if directory == JOB_PRESETS_DIR else (directory,):
+        with contextlib.suppress(FileNotFoundError): names.update(p.name[:-len(JOB_PRESET_SUFFIX)] for p in Path(folder).iterdir() if p.name.endswith(JOB_PRESET_SUFFIX))
+    return sorted(names)
+
+def save_job_preset(name, settings, input_files, directory=JOB_PRESETS_DIR):
+    """Saves settings (JOB_SETTING_KEYS) and the ordered input list as a gzipped JSON job preset, atomically. Returns its path."""
+    path = job_preset_path(name, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    job = {'version': JOB_PRESET_VERSION, 'settings': {key: settings[key] for key in JOB_SETTING_KEYS if key in settings},
+           'files': encode_file_list(input_files)}
+    write_file_atomic(path, gzip.compress(json.dumps(job, separators=(',', ':')).encode('utf-8'), compresslevel=6))
+    return path
+
+def load_job_preset(name, directory=JOB_PRESETS_DIR):
+    """Returns (settings, input_files) from a job preset name or path. Raises ValueError for unreadable or unknown-version files."""
+    path = job_preset_path(name, directory)
+    try:
+        with gzip.open(path, 'rb') as f: job = json.loads(f.read())
+    except (OSError, EOFError, json.JSONDecodeError) as e: raise ValueError(f"Could not read job preset '{path}': {e}") from e
+    if not isinstance(job, dict) or job.get('version') != JOB_PRESET_VERSION: raise ValueError(f"Unsupported job preset format in '{path}'.")
+    settings = job.get('settings', {})
+    try:
+        if not isinstance(settings, dict): raise TypeError("'settings' is not an object")
+        input_files = decode_file_list(job['files'])
+    except (KeyError, TypeError, IndexError, AttributeError, ValueError) as e: raise ValueError(f"Damaged job preset '{path}': {e!r}") from e
+    return settings, input_files
+
+JOB_DEFAULTS = {'output_profile': DEFAULT_OUTPUT_PROFILE, 'quality_crf': "36", 'time_per_image_sec': "1.5", 'downscale_enabled': True,
+                'downscale_factor': "0.5", 'auto_resolution': False, 'extra_output_profiles': [], 'extra_output_heights': "",
+                'streaming_format': "Single file", 'mosaic_grid': "Off"}
+
+class RenderError(RuntimeError):
+    """FFmpeg exited with an error. stderr_tail holds its last output lines."""
+    def __init__(self, returncode, stderr_tail):
+        self.returncode, self.stderr_tail = returncode, stderr_tail
+        super().__init__(f"FFmpeg failed with code {returncode}")
+
+def find_ffmpeg_executable():
+    """FFmpeg next to the script (or in the PyInstaller bundle), else on PATH. None when missing."""
+    exe_name = "ffmpeg.exe" if platform.system() == "Windows" else "ffmpeg"
+    local = Path(getattr(sys, '_MEIPASS', Path(__file__).parent)).resolve() / exe_name
+    return str(local) if local.is_file() else shutil.which(exe_name)
+
+def resolve_render_settings(job, input_files=None, base_size=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, max_output_pixels=DEFAULT_MAX_OUTPUT_PIXELS):
+    """Turns job settings (JOB_SETTING_KEYS, as stored in the config file) into render settings: timing, codec, target size,
+    CRF, every output variant and the FFmpeg memory estimate. base_size is the size the downscale factor applies to; when
+    omitted it is planned from input_files (auto resolution) or read from the first image. Raises ValueError."""
+    job = {**JOB_DEFAULTS, **(job or {})}
+    try: time_sec = float(job['time_per_image_sec'])
+    except (TypeError, ValueError): raise ValueError(f"Invalid delay: {job['time_per_image_sec']}")
+    if not (math.isfinite(time_sec) and time_sec > 0): raise ValueError("Delay must be a positive number of seconds.")
+    profile_str = job['output_profile']
+    if profile_str not in OUTPUT_PROFILES: raise ValueError(f"Invalid profile: {profile_str}")
+    codec, container = OUTPUT_PROFILES[profile_str]['codec'], OUTPUT_PROFILES[profile_str]['container']
+    auto = bool(job['auto_resolution'])
+    if base_size is None:
+        if not input_files: raise ValueError("No input images.")
+        plan = plan_output_resolution(input_files, max_output_pixels) if auto else None
+        base_size = (plan['width'], plan['height']) if plan else read_display_size(input_files[0])
+    first_w, first_h = base_size
+    if job['downscale_enabled']:
+        try: factor = float(job['downscale_factor'])
+        except (TypeError, ValueError): factor = 0
+        if not (math.isfinite(factor) and 0 < factor <= 1.0): raise ValueError("Downscale factor must be > 0 and <= 1.0.")
+        target_w, target_h = output_target_size(first_w, first_h, factor)
+        logging.info(f"Target (Downscaled x{factor}): {target_w}x{target_h}")
+    else:
+        target_w, target_h = output_target_size(first_w, first_h)
+        logging.info(f"Target (Original): {target_w}x{target_h}")
+    try: crf = int(job['quality_crf'])
+    except (TypeError, ValueError): raise ValueError(f"Invalid CRF: {job['quality_crf']}")
+    if not (0 <= crf <= CODEC_MAX_CRF[codec]): raise ValueError(f"Invalid CRF. For {CODEC_SHORT_NAMES[codec].upper()}, use 0-{CODEC_MAX_CRF[codec]}.")
+    extra_heights = parse_output_heights(str(job['extra_output_heights']))
+    extra_profiles = list(job['extra_output_profiles'])
+    streaming_format = STREAMING_FORMATS.get(job['streaming_format'])
+    if streaming_format:
+        if extra_profiles: logging.warning("Extra output formats are ignored for HLS/DASH output; extra heights form the rendition ladder.")
+        extra_profiles, container = [], STREAMING_MANIFEST_EXTENSIONS[streaming_format]
+    if job['mosaic_grid'] not in MOSAIC_GRIDS: raise ValueError(f"Invalid grid: {job['mosaic_grid']}")
+    mosaic = MOSAIC_GRIDS[job['mosaic_grid']]
+    if mosaic and min(target_w // mosaic[0], target_h // mosaic[1]) < MOSAIC_MIN_TILE_PIXELS:
+        raise ValueError(f"Grid {job['mosaic_grid']} is too fine for {target_w}x{target_h} output.")
+    outputs = plan_output_variants(profile_str, extra_profiles, target_w, target_h, extra_heights, crf)
+    if len(outputs) > 1: logging.info(f"Multi-output render: {[(v['profile_str'], v['width'], v['height']) for v in outputs]}")
+    ffmpeg_bytes = sum(estimate_ffmpeg_bytes(v['width'], v['height']) for v in outputs)
+    if memory_limit_mb and ffmpeg_bytes > memory_limit_mb * 2**20:
+        raise ValueError(f"Output {target_w}x{target_h} ({len(outputs)} encode(s)) needs about {ffmpeg_bytes / 2**20:.0f} MB, "
+                         f"above the {memory_limit_mb} MB memory limit.\nLower the downscale factor, drop extra outputs or raise 'memory_limit_mb' in the settings file.")
+    return {'milliseconds_per_image': int(time_sec * 1000), 'codec': codec, 'container': container, 'profile_str': profile_str,
+            'target_width': target_w, 'target_height': target_h, 'crf': crf, 'streaming_format': streaming_format,
+            'outputs': outputs, 'ffmpeg_bytes': ffmpeg_bytes, 'mosaic': mosaic}
+
+def render_output_files(settings, output_file):
+    """Files a render with these settings writes; for HLS/DASH only the manifest (see snapshot_render_outputs for the segments)."""
+    if settings['streaming_format']: return [output_file]
+    return [output_path_for_variant(output_file, variant) for variant in settings['outputs']]
+
+def remove_render_outputs(output_file, output_files, streaming_format=None, before=None):
+    """Deletes the (partial) files of a failed or cancelled render, including HLS/DASH segments. With before (a
+    snapshot_render_outputs() result taken before FFmpeg started), files that existed then and were not rewritten are kept."""
+    current = snapshot_render_outputs(output_file, output_files, streaming_format)
+    for path, mtime_ns in sorted(current.items()):
+        if before is not None and before.get(path) == mtime_ns: continue
+        try:
+            logging.info(f"Removing partial output: {path}")
+            os.remove(path)
+        except OSError as e: logging.warning(f"Could not remove partial output {path}: {e}")
+
+def build_render_command(ffmpeg_executable, input_files, settings, output_file, metrics=None):
+    """Dispatches to the streaming, multi-output or single-output builder. Returns (ffmpeg_cmd, concat_path)."""
+    if settings['streaming_format']:
+        return build_ffmpeg_streaming_command(ffmpeg_executable, input_files, settings, settings['outputs'], output_file, settings['streaming_format'], metrics)
+    if len(settings['outputs']) > 1:
+        outputs = [dict(variant, output_file=path) for variant, path in zip(settings['outputs'], render_output_files(settings, output_file))]
+        return build_ffmpeg_multi_output_command(ffmpeg_executable, input_files, settings, outputs, metrics)
+    return build_ffmpeg_concat_command(ffmpeg_executable, input_files, settings, output_file, metrics)
+
+def render_slideshow(ffmpeg_executable, input_files, settings, output_file, cancel_event=None, progress_callback=None,
+                     background_priority=False, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, on_process=None, metrics=None, verify_quality=False):
+    """The render pipeline behind the GUI, --watch and --serve, for resolve_render_settings() output: input validation,
+    normalization, one FFmpeg run and, with verify_quality, the quality check (report in <output_file>.quality.json).
+    progress_callback gets status and FFmpeg progress lines; on_process(popen) is called once FFmpeg starts, so the caller can
+    pause or terminate it. With metrics, stages are timed and <output_file>.metrics.json is written for every outcome.
+    Returns (output_files, quality_report); the report is None when not requested, cancelled or failed (the video is kept).
+    Raises InputValidationError, ValueError, RenderError or InterruptedError (cancel_event set before FFmpeg finished);
+    partial outputs are removed."""
+    status = 'failed'
+    try:
+        with metrics.profiled() if metrics else contextlib.nullcontext():
+            result = _run_render_pipeline(ffmpeg_executable, input_files, settings, output_file, cancel_event, progress_callback or (lambda line: None),
+                                          background_priority, memory_limit_mb, on_process, metrics, verify_quality)
+        status = 'done'
+        return result
+    except InterruptedError: status = 'cancelled'; raise
+    finally:
+        if metrics:
+            metrics.status = status
+            try: metrics.write(output_file, extra={'outputs': render_output_files(settings, output_file)})
+            except Exception as e: logging.warning(f"Could not write render metrics: {e}")
+
+def _run_render_pipeline(ffmpeg_executable, input_files, settings, output_file, cancel_event, progress, background_priority, memory_limit_mb,
+                         on_process, metrics, verify_quality):
+    progress(f"Checking {len(input_files)} images...")
+    with _metrics_stage(metrics, 'validate_inputs'): _, animations = validate_inputs(input_files, metrics, progress)
+    settings = dict(settings, animations=animations)
+    if settings['mosaic']: prepared = input_files # Tiles are decoded small by iter_mosaic_frames, full-size proxies would be wasted.
+    else:
+        with _metrics_stage(metrics, 'prepare_images'):
+            prepared = prepare_input_images(input_files, settings['target_width'], settings['target_height'], memory_limit_mb,
+                                            progress_callback=progress, cancel_event=cancel_event, skip=animations, ffmpeg_bytes=settings['ffmpeg_bytes'])
+    output_files = render_output_files(settings, output_file)
+    process, concat_path, finished, existing_outputs = None, None, False, None
+    try:
+        with _metrics_stage(metrics, 'concat_file'): cmd, concat_path = build_render_command(ffmpeg_executable, prepared, settings, output_file, metrics)
+        if metrics: metrics.command = cmd
+        if cancel_event and cancel_event.is_set(): raise InterruptedError("Cancelled before FFmpeg started.")
+        progress("Starting FFmpeg...")
+        logging.info(f"Executing FFmpeg:\n  {' '.join(shlex.quote(str(s)) for s in cmd)}")
+        popen_cmd, popen_kwargs = _background_priority_popen_args(cmd) if background_priority else (cmd, {})
+        if platform.system() == "Windows": popen_kwargs['creationflags'] = popen_kwargs.get('creationflags', 0) | subprocess.CREATE_NO_WINDOW
+        existing_outputs = snapshot_render_outputs(output_file, output_files, settings['streaming_format'])
+        with _metrics_stage(metrics, 'ffmpeg'):
+            process = subprocess.Popen(popen_cmd, stdin=subprocess.PIPE if settings['mosaic'] else None, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                       text=True, encoding='utf-8', errors='replace', bufsize=1, **popen_kwargs)
+            if on_process: on_process(process)
+            if settings['mosaic']: start_mosaic_feeder(process, prepared, settings, cancel_event)
+            tail = collections.deque(maxlen=20)
+            for line in iter(process.stderr.readline, ''):
+                line = line.strip()
+                logging.info(f"FFMPEG: {line}")
+                tail.append(line)
+                if metrics: metrics.parse_ffmpeg_line(line)
+                if line.startswith('frame='): progress(line)
+            process.stderr.close(); process.wait()
+        if metrics: metrics.exit_code = process.returncode
+        if process.returncode != 0:
+            if cancel_event and cancel_event.is_set(): raise InterruptedError(f"FFmpeg terminated (code {process.returncode})")
+            raise RenderError(process.returncode, "\n".join(tail))
+        finished = True # The outputs are final; a cancel from here on only stops the quality check.
+        report = None
+        if verify_quality:
+            progress("Verifying quality...")
+            try:
+                with _metrics_stage(metrics, 'verify_quality'):
+                    report = verify_render_quality(ffmpeg_executable, output_files[0], input_files, settings, cancel_event=cancel_event, progress_callback=progress)
+                write_quality_report(output_file, report)
+            except InterruptedError: logging.info("Quality verification cancelled."); report = None
+            except Exception: logging.exception("Quality verification failed:"); report = None
+        return output_files, report
+    finally:
+        if process and process.poll() is None:
+            process.terminate()
+            try: process.wait(timeout=5)
+            except subprocess.TimeoutExpired: process.kill()
+        if concat_path:
+            with contextlib.suppress(OSError): os.remove(concat_path)
+        if not finished and existing_outputs is not None: # Only once FFmpeg may have written; earlier files are the user's.
+            remove_render_outputs(output_file, output_files, settings['streaming_format'], existing_outputs)
+        release_proxies(prepared)
+
+WATCH_POLL_SEC = 2.0
+WATCH_SETTLE_SEC = 10.0
+WATCH_RESCAN_SEC = 60.0 # Settled batches are re-walked at most this often unless their folder's mtime changes.
+WATCH_THREADS_PER_RENDER = 4
+WATCH_RETRY_SEC = 60.0 # A failed batch is retried after this long, doubling per consecutive failure up to WATCH_RETRY_MAX_SEC.
+WATCH_RETRY_MAX_SEC = 3600.0
+WATCH_STATE_FILE = ".slideshow-watch.json"
+FINGERPRINT_SAMPLE_BYTES = 64 * 1024
+
+def scan_batch(batch_dir):
+    """Sorted (path, size, mtime_ns) of every image under batch_dir, recursively like 'Add Folder'."""
+    entries = []
+    for root, _, filenames in os.walk(batch_dir):
+        for name in filenames:
+            if not name.lower().endswith(IMAGE_EXTENSIONS): continue
+            path = os.path.join(root, name)
+            try: st = os.stat(path)
+            except OSError: continue
+            entries.append((path, st.st_size, st.st_mtime_ns))
+    entries.sort()
+    return entries
+
+@functools.lru_cache(maxsize=IMAGE_METADATA_CACHE_SIZE)
+def _sampled_file_digest(path, size, mtime_ns):
+    """SHA-1 of the size plus the first and last FINGERPRINT_SAMPLE_BYTES (the whole file when small). Cached per mtime."""
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+        if size > 2 * FINGERPRINT_SAMPLE_BYTES: f.seek(-FINGERPRINT_SAMPLE_BYTES, os.SEEK_END)
+        digest.update(f.read())
+    return digest.hexdigest()
+
+def batch_fingerprint(batch_dir, entries, job):
+    """Content fingerprint of a batch: relative paths, order and sampled file contents, plus the job settings. Copying a batch
+    again (new mtimes, same bytes) keeps the fingerprint; changing an image or a setting does not."""
+    digest = hashlib.sha1(json.dumps(job, sort_keys=True).encode('utf-8'))
+    for path, size, mtime_ns in entries:
+        digest.update(os.path.relpath(path, batch_dir).encode('utf-8', 'surrogateescape'))
+        digest.update(_sampled_file_digest(path, size, mtime_ns).encode('ascii'))
+    return digest.hexdigest()
+
+def watch_output_name(batch_dir):
+    """Output file stem for a batch: the folder name plus a short hash of its full path, so equally named batches in different
+    watched folders never overwrite each other's videos."""
+    batch_dir = os.path.abspath(batch_dir)
+    return f"{os.path.basename(batch_dir)}_{hashlib.sha1(batch_dir.encode('utf-8')).hexdigest()[:8]}"
+
+class FolderWatcher:
+    """Watch-folder daemon. Every immediate subfolder of a watched directory is one batch. A batch renders once its image list
+    has been unchanged for settle_sec; batches whose fingerprint matches their last successful render are skipped, failed ones
+    are retried with a backoff. Up to `jobs` renders run at once, each FFmpeg encoder capped at cpu_budget // jobs threads. Render records persist in output_dir/WATCH_STATE_FILE."""
+    def __init__(self, watch_dirs, output_dir, job, ffmpeg_executable, settle_sec=WATCH_SETTLE_SEC, poll_sec=WATCH_POLL_SEC,
+                 cpu_budget=None, jobs=None, background_priority=False, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB):
+        self.watch_dirs, self.output_dir = [os.path.abspath(d) for d in watch_dirs], Path(output_dir).resolve()
+        self.job, self.ffmpeg_executable = {**JOB_DEFAULTS, **(job or {})}, ffmpeg_executable
+        self.settle_sec, self.poll_sec = settle_sec, poll_sec
+        cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+        self.jobs = max(1, jobs or cpu_budget // WATCH_THREADS_PER_RENDER)
+        self.threads_per_render = max(1, cpu_budget // self.jobs)
+        self.background_priority, self.memory_limit_mb = background_priority, memory_limit_mb
+        self.state_path = self.output_dir / WATCH_STATE_FILE
+        try: self.state = json.loads(self.state_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError): self.state = {}
+        self.state_lock, self.stop_event = threading.Lock(), threading.Event()
+        self.scanned, self.pending, self.running, self.processes = {}, {}, {}, set()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="watch-render")
+
+    def run(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        logging.info(f"Watching {', '.join(self.watch_dirs)} -> {self.output_dir} ({self.jobs} concurrent render(s), {self.threads_per_render} thread(s) each).")
+        try:
+            while not self.stop_event.is_set():
+                self.poll_once(time.monotonic())
+                self.stop_event.wait(self.poll_sec)
+        finally: self.stop()
+
+    def stop(self):
+        self.stop_event.set()
+        for process in list(self.processes):
+            with contextlib.suppress(OSError): process.terminate()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def poll_once(self, now):
+        for batch_dir, future in list(self.running.items()):
+            if future.done(): del self.running[batch_dir]
+        for watch_dir in self.watch_dirs:
+            try: batch_dirs = [entry.path for entry in os.scandir(watch_dir) if entry.is_dir() and not entry.name.startswith('.')
+                               and Path(entry.path).resolve() != self.output_dir]
+            except OSError as e: logging.warning(f"Watch: cannot list '{watch_dir}': {e}"); continue
+            for batch_dir in batch_dirs:
+                if batch_dir not in self.running: self._check_batch(batch_dir, now)
+
+    def _check_batch(self, batch_dir, now):
+        try: dir_mtime = os.stat(batch_dir).st_mtime_ns
+        except OSError: return
+        scanned = self.scanned.get(batch_dir)
+        if scanned and batch_dir not in self.pending and scanned[0] == dir_mtime and now - scanned[1] < WATCH_RESCAN_SEC: return
+        entries = scan_batch(batch_dir)
+        signature = hash(tuple(entries))
+        self.scanned[batch_dir] = (dir_mtime, now, signature)
+        if not entries: self.pending.pop(batch_dir, None); return
+        if scanned and scanned[2] == signature and batch_dir not in self.pending and not self._retry_due(batch_dir): return # Nothing changed since it settled.
+        pending = self.pending.get(batch_dir)
+        if not pending or pending[0] != signature: self.pending[batch_dir] = (signature, now); return
+        if now - pending[1] < self.settle_sec: return
+        del self.pending[batch_dir]
+        try: fingerprint = batch_fingerprint(batch_dir, entries, self.job)
+        except OSError as e: logging.warning(f"Watch: cannot fingerprint '{batch_dir}': {e}"); return
+        record = self.state.get(batch_dir, {})
+        if record.get('fingerprint') == fingerprint:
+            logging.info(f"Watch: '{batch_dir}' is unchanged since its last render, skipping."); return
+        if record.get('failed_fingerprint') == fingerprint and not self._retry_due(batch_dir):
+            logging.info(f"Watch: '{batch_dir}' failed to render before, retrying after {time.strftime('%H:%M:%S', time.localtime(record['retry_after']))}."); return
+        logging.info(f"Watch: batch '{batch_dir}' settled with {len(entries)} image(s), queueing render.")
+        self.running[batch_dir] = self.executor.submit(self._render_batch, batch_dir, [path for path, _, _ in entries], fingerprint)
+
+    def _retry_due(self, batch_dir):
+        record = self.state.get(batch_dir, {})
+        return 'failed_fingerprint' in record and time.time() >= record.get('retry_after', 0)
+
+    def _render_batch(self, batch_dir, input_files, fingerprint):
+        processes = []
+        def track(process): processes.append(process); self.processes.add(process)
+        record, error = {'fingerprint': fingerprint, 'images': len(input_files), 'rendered': time.strftime('%Y-%m-%dT%H:%M:%S')}, None
+        try:
+            settings = dict(resolve_render_settings(self.job, input_files, memory_limit_mb=self.memory_limit_mb), threads=self.threads_per_render)
+            output_file = str(self.output_dir / f"{watch_output_name(batch_dir)}{settings['container']}")
+            start = time.perf_counter()
+            record['outputs'], _ = render_slideshow(self.ffmpeg_executable, input_files, settings, output_file, cancel_event=self.stop_event,
+                                                 background_priority=self.background_priority, memory_limit_mb=self.memory_limit_mb, on_process=track)
+            logging.info(f"Watch: rendered '{batch_dir}' -> {', '.join(record['outputs'])} in {time.perf_counter() - start:.1f}s.")
+        except InterruptedError: return
+        except RenderError as e: logging.error(f"Watch: rendering '{batch_dir}' failed: {e}\n{e.stderr_tail}"); error = str(e)
+        except Exception as e: logging.exception(f"Watch: rendering '{batch_dir}' failed:"); error = str(e)
+        finally:
+            for process in processes: self.processes.discard(process)
+        with self.state_lock:
+            if error: # Keep the last successful render's record; only a success may suppress future renders of this content.
+                previous = self.state.get(batch_dir, {})
+                failures = previous.get('failures', 0) + 1 if previous.get('failed_fingerprint') == fingerprint else 1
+                delay = min(WATCH_RETRY_MAX_SEC, WATCH_RETRY_SEC * 2 ** (failures - 1))
+                record = {**{key: previous[key] for key in ('fingerprint', 'images', 'rendered', 'outputs') if key in previous},
+                          'failed_fingerprint': fingerprint, 'failures': failures, 'error': error,
+                          'failed': time.strftime('%Y-%m-%dT%H:%M:%S'), 'retry_after': time.time() + delay}
+                logging.info(f"Watch: will retry '{batch_dir}' in {delay:.0f}s (failure {failures}).")
+            self.state[batch_dir] = record
+            try: write_file_atomic(self.state_path, json.dumps(self.state, indent=4).encode('utf-8'))
+            except OSError as e: logging.warning(f"Watch: could not save '{self.state_path}': {e}")
+
+def _read_saved_config(config_file=None):
+    try: config = json.loads(Path(config_file or Path(tempfile.gettempdir()) / CONFIG_FILENAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError): return {}
+    return config if isinstance(config, dict) else {}
+
+def load_job_settings(job_name=None, config_file=None):
+    """Job settings for headless renders: a saved job preset when job_name is given, otherwise the GUI's saved settings."""
+    if job_name: return load_job_preset(job_name)[0]
+    config = _read_saved_config(config_file)
+    return {key: config[key] for key in JOB_SETTING_KEYS if key in config and key != 'output_file_hint'}
+
+def load_render_options(config_file=None):
+    """(background_priority, memory_limit_mb) from the GUI's saved settings, falling back to the defaults for missing or invalid values."""
+    config = _read_saved_config(config_file)
+    background_priority = config.get('background_priority', False)
+    memory_limit_mb = config.get('memory_limit_mb', DEFAULT_MEMORY_LIMIT_MB)
+    if not isinstance(background_priority, bool): background_priority = False
+    if not isinstance(memory_limit_mb, int) or isinstance(memory_limit_mb, bool) or memory_limit_mb < 0: memory_limit_mb = DEFAULT_MEMORY_LIMIT_MB
+    return background_priority, memory_limit_mb
+
+SERVICE_DEFAULT_PORT = 8765
+SERVICE_MAX_REQUEST_BYTES = 64 * 1024 ** 2 # Enough for job requests listing ~100k paths.
+SERVICE_SSE_KEEPALIVE_SEC = 15.0
+SERVICE_JOB_RETENTION_SEC = 24 * 3600 # Finished jobs (and their files) are dropped this long after finishing, or on DELETE.
+SERVICE_JOB_ALIASES = {'profile': 'output_profile', 'crf': 'quality_crf', 'delay': 'time_per_image_sec', 'grid': 'mosaic_grid'}
+
+class RenderJob:
+    """One queued service render. Every state change bumps version and wakes wait_for_change(), which SSE streams poll."""
+    def __init__(self, input_files, settings, output_file, verify_quality=False):
+        self.id, self.input_files, self.settings, self.output_file = uuid.uuid4().hex[:12], input_files, settings, output_file
+        self.status, self.message, self.frame, self.error, self.outputs, self.quality = 'queued', "", None, None, [], None
+        self.verify_quality = verify_quality
+        self.created, self.started, self.finished = time.time(), None, None
+        self.cancel_event, self.process, self.version = threading.Event(), None, 0
+        self._cond = threading.Condition()
+
+    def update(self, **changes):
+        with self._cond:
+            for key, value in changes.items(): setattr(self, key, value)
+            self.version += 1; self._cond.notify_all()
+
+    def wait_for_change(self, version, timeout):
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.to_dict()
+
+    @property
+    def done(self): return self.status in ('done', 'failed', 'cancelled')
+
+    def to_dict(self):
+        return {'id': self.id, 'status': self.status, 'message': self.message, 'frame': self.frame, 'error': self.error,
+                'images': len(self.input_files), 'outputs': [os.path.basename(path) for path in self.outputs], 'quality': self.quality,
+                'resolution': f"{self.settings['target_width']}x{self.settings['target_height']}", 'profile': self.settings['profile_str'],
+                'created': self.created, 'started': self.started, 'finished': self.finished}
+
+def _service_setting(key, value):
+    """Checks a job request value against the type of its JOB_DEFAULTS entry (numbers are accepted for text fields). Raises ValueError."""
+    default = JOB_DEFAULTS[key]
+    if isinstance(default, bool):
+        if not isinstance(value, bool): raise ValueError(f"'{key}' must be true or false.")
+        return value
+    if isinstance(default, list):
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value): raise ValueError(f"'{key}' must be a list of strings.")
+        return value
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)): raise ValueError(f"'{key}' must be a string or number.")
+    return str(value)
+
+class RenderService:
+    """Local render queue behind the HTTP API. Jobs run through render_slideshow, at most max_concurrent at a time, and each
+    writes into output_dir/<job id>/."""
+    def __init__(self, ffmpeg_executable, output_dir, max_concurrent=1, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, background_priority=False):
+        self.ffmpeg_executable, self.output_dir = ffmpeg_executable, Path(output_dir).resolve()
+        self.memory_limit_mb, self.background_priority = memory_limit_mb, background_priority
+        self.jobs, self._lock = {}, threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_concurrent), thread_name_prefix="service-render")
+
+    def submit(self, request):
+        """Validates a job request ({"files": [...], plus JOB_SETTING_KEYS, the profile/crf/delay/downscale shorthands and
+        "verify_quality"}) and queues it. Raises ValueError for bad requests."""
+        if not isinstance(request, dict): raise ValueError("Job must be a JSON object.")
+        input_files = request.get('files')
+        if not isinstance(input_files, list) or not input_files or not all(isinstance(path, str) for path in input_files):
+            raise ValueError("'files' must be a non-empty list of image paths.")
+        verify_quality = request.get('verify_quality', False)
+        if not isinstance(verify_quality, bool): raise ValueError("'verify_quality' must be true or false.")
+        job = {key: _service_setting(key, request[key]) for key in JOB_SETTING_KEYS if key in request and key != 'output_file_hint'}
+        job.update({key: _service_setting(key, request[alias]) for alias, key in SERVICE_JOB_ALIASES.items() if alias in request})
+        if 'downscale' in request:
+            downscale = request['downscale'] # true: the default factor; false/null/1: full size; otherwise the factor.
+            if isinstance(downscale, bool) or downscale is None: job['downscale_enabled'] = bool(downscale)
+            else:
+                job['downscale_factor'] = _service_setting('downscale_factor', downscale)
+                try: job['downscale_enabled'] = float(job['downscale_factor']) != 1.0
+                except ValueError: job['downscale_enabled'] = True # Let resolve_render_settings reject it.
+        self.purge_expired()
+        settings = resolve_render_settings(job, input_files, memory_limit_mb=self.memory_limit_mb)
+        render_job = RenderJob(input_files, settings, None, verify_quality)
+        render_job.output_file = str(self.output_dir / render_job.id / f"slideshow{settings['container']}")
+        with self._lock: self.jobs[render_job.id] = render_job
+        self.executor.submit(self._run, render_job)
+        logging.info(f"Service: queued job {render_job.id} ({len(input_files)} images, {settings['profile_str']}).")
+        return render_job
+
+    def cancel(self, render_job):
+        render_job.cancel_event.set()
+        process = render_job.process
+        if process and process.poll() is None:
+            with contextlib.suppress(OSError): process.terminate()
+        if render_job.status == 'queued': render_job.update(status='cancelled', finished=time.time())
+
+    def remove(self, render_job):
+        """Forgets a finished job and deletes its output folder."""
+        with self._lock: self.jobs.pop(render_job.id, None)
+        shutil.rmtree(Path(render_job.output_file).parent, ignore_errors=True)
+        logging.info(f"Service: removed job {render_job.id}.")
+
+    def purge_expired(self, retention_sec=SERVICE_JOB_RETENTION_SEC):
+        cutoff = time.time() - retention_sec
+        for render_job in list(self.jobs.values()):
+            if render_job.done and render_job.finished and render_job.finished < cutoff: self.remove(render_job)
+
+    def _run(self, render_job):
+        if render_job.cancel_event.is_set(): return
+        render_job.update(status='running', started=time.time(), message="Starting...")
+        def progress(line):
+            match = re.search(r'frame=\s*(\d+)', line)
+            render_job.update(message=" ".join(line.split()), frame=int(match.group(1)) if match else render_job.frame)
+        try:
+            Path(render_job.output_file).parent.mkdir(parents=True, exist_ok=True)
+            outputs, report = render_slideshow(self.ffmpeg_executable, render_job.input_files, render_job.settings, render_job.output_file,
+                                               cancel_event=render_job.cancel_event, progress_callback=progress, background_priority=self.background_priority,
+                                               memory_limit_mb=self.memory_limit_mb, on_process=lambda process: setattr(render_job, 'process', process),
+                                               verify_quality=render_job.verify_quality)
+            quality = {key: report[key] for key in ('mean_ssim', 'worst_ssim', 'mean_psnr', 'flagged', 'suggested_crf')} if report else None
+            render_job.update(status='done', outputs=outputs, quality=quality, message="Done.", finished=time.time())
+            logging.info(f"Service: job {render_job.id} done -> {', '.join(outputs)}")
+        except InterruptedError: render_job.update(status='cancelled', message="Cancelled.", finished=time.time())
+        except RenderError as e:
+            logging.error(f"Service: job {render_job.id} failed: {e}\n{e.stderr_tail}")
+            render_job.update(status='failed', error=f"{e}\n{e.stderr_tail}", finished=time.time())
+        except Exception as e:
+            logging.exception(f"Service: job {render_job.id} failed:")
+            render_job.update(status='failed', error=str(e), finished=time.time())
+        finally: render_job.process = None
+
+    def shutdown(self):
+        for render_job in list(self.jobs.values()): self.cancel(render_job)
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+class _RenderServiceHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP/JSON API: POST /jobs, GET /jobs, GET /jobs/<id>, GET /jobs/<id>/events (SSE), GET /jobs/<id>/output,
+    GET /jobs/<id>/files/<name> (HLS/DASH segments and extra outputs), DELETE /jobs/<id> (cancels a running job, removes a
+    finished one with its files). Browser requests from other origins are refused; with server.token set, every request must
+    carry it as "Authorization: Bearer <token>" or ?token=<token> (for EventSource)."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args): logging.debug(f"Service: {self.address_string()} {format % args}")
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json'); self.send_header('Content-Length', str(len(body)))
+        self.end_headers(); self.wfile.write(body)
+
+    def _allowed(self):
+        """Sends 403/401 and returns False for cross-origin or unauthenticated requests."""
+        origin = self.headers.get('Origin')
+        if origin and urllib.parse.urlsplit(origin).netloc != self.headers.get('Host'):
+            self._send_json(403, {'error': "Cross-origin requests are not allowed."}); return False
+        if not self.server.token: return True
+        auth = self.headers.get('Authorization', '')
+        given = auth[7:] if auth.startswith('Bearer ') else urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query).get('token', [''])[0]
+        if hmac.compare_digest(given.encode('utf-8'), self.server.token.encode('utf-8')): return True
+        self._send_json(401, {'error': "Missing or wrong token."}); return False
+
+    def _route(self):
+        parts = [urllib.parse.unquote(part) for part in urllib.parse.urlsplit(self.path).path.strip('/').split('/') if part]
+        if not parts or parts[0] != 'jobs': return None, parts
+        render_job = self.server.service.jobs.get(parts[1]) if len(parts) > 1 else None
+        return render_job, parts
+
+    def do_POST(self):
+        if not self._allowed(): return
+        _, parts = self._route()
+        if parts != ['jobs']: return self._send_json(404, {'error': "Not found."})
+        try: length = int(self.headers.get('Content-Length') or 0)
+        except ValueError: length = -1
+        if not 0 < length <= SERVICE_MAX_REQUEST_BYTES:
+            self.close_connection = True # The unread body would be parsed as the next request.
+            return self._send_json(413 if length else 411, {'error': "Missing or oversized request body."})
+        try: render_job = self.server.service.submit(json.loads(self.rfile.read(length)))
+        except (ValueError, OSError) as e: return self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            logging.exception("Service: could not queue job:")
+            return self._send_json(500, {'error': str(e)})
+        base = f"/jobs/{render_job.id}"
+        self._send_json(202, dict(render_job.to_dict(), status_url=base, events_url=f"{base}/events", output_url=f"{base}/output"))
+
+    def do_DELETE(self):
+        if not self._allowed(): return
+        render_job, parts = self._route()
+        if not render_job or len(parts) != 2: return self._send_json(404, {'error': "Unknown job."})
+        if render_job.done:
+            self.server.service.remove(render_job)
+            return self._send_json(200, dict(render_job.to_dict(), removed=True))
+        self.server.service.cancel(render_job)
+        self._send_json(200, render_job.to_dict())
+
+    def do_GET(self):
+        if not self._allowed(): return
+        render_job, parts = self._route()
+        if parts == ['jobs']: return self._send_json(200, [job.to_dict() for job in list(self.server.service.jobs.values())])
+        if not render_job: return self._send_json(404, {'error': "Unknown job."})
+        if len(parts) == 2: return self._send_json(200, render_job.to_dict())
+        if parts[2] == 'events' and len(parts) == 3: return self._send_events(render_job)
+        if parts[2] == 'output' and len(parts) == 3: return self._send_file(render_job, render_job.output_file)
+        if parts[2] == 'files' and len(parts) == 4: return self._send_file(render_job, str(Path(render_job.output_file).parent / os.path.basename(parts[3])))
+        self._send_json(404, {'error': "Not found."})
+
+    def _send_events(self, render_job):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream'); self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close'); self.end_headers()
+        self.close_connection = True
+        version, last_status = -1, None
+        try:
+            while True:
+                new_version, snapshot = render_job.wait_for_change(version, SERVICE_SSE_KEEPALIVE_SEC)
+                if new_version == version: self.wfile.write(b": keepalive\n\n"); self.wfile.flush(); continue
+                version = new_version
+                event = 'progress' if snapshot['status'] == last_status else 'status' # Bursts of progress collapse into the latest snapshot.
+                last_status = snapshot['status']
+                self.wfile.write(f"event: {event}\nid: {version}\ndata: {json.dumps(snapshot)}\n\n".encode('utf-8')); self.wfile.flush()
+                if render_job.done and render_job.version == version: break
+        except (BrokenPipeError, ConnectionResetError): pass
+
+    def _send_file(self, render_job, path):
+        if render_job.status != 'done': return self._send_json(409, {'error': f"Job is {render_job.status}."})
+        try: f = open(path, 'rb')
+        except OSError: return self._send_json(404, {'error': "File not found."})
+        with f:
+            content_type = {'.mp4': 'video/mp4', '.webm': 'video/webm', '.m3u8': 'application/vnd.apple.mpegurl', '.mpd': 'application/dash+xml',
+                            '.m4s': 'video/iso.segment'}.get(Path(path).suffix.lower(), 'application/octet-stream')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type); self.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+            self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(path)}"'); self.end_headers()
+            with contextlib.suppress(BrokenPipeError, ConnectionResetError): shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+
+def create_render_server(service, host='127.0.0.1', port=SERVICE_DEFAULT_PORT, token=None):
+    """ThreadingHTTPServer serving service; port 0 picks a free port (see server.server_address). token (if set) is required on every request."""
+    server = http.server.ThreadingHTTPServer((host, port), _RenderServiceHandler)
+    server.daemon_threads, server.service, server.token = True, service, token
+    return server
+
 class ToolTip:
     def __init__(self, widget, text, position='default'):
         self.widget = widget
@@ -140,8 +1866,13 @@ def handle_unhandled_exception(exc_type, exc_value, exc_traceback):
     except Exception as open_error: logging.error(f"Error opening log file '{log_file_path}': {open_error}")
 
 class ImagesToVideoSlideshow:
-    def __init__(self):
+    def __init__(self, collect_metrics=None, profile_render=None):
         self.is_loading = True
+        self.cli_collect_metrics, self.cli_profile_render = collect_metrics, profile_render
+        self.collect_metrics, self.profile_render = False, False
+        self.config_collect_metrics, self.config_profile_render = False, False
+        self.current_metrics = None
+        self.memory_limit_mb = DEFAULT_MEMORY_LIMIT_MB
         self.ffmpeg_executable = self._find_ffmpeg_executable()
         if not self.ffmpeg_executable:
              logging.critical("FFmpeg executable not found. Application cannot continue.")
@@ -175,6 +1906,28 @@ class ImagesToVideoSlideshow:
         self.quality_crf = tk.StringVar(value="36")
         self.downscale_enabled = tk.BooleanVar(value=True)
         self.output_profile = tk.StringVar(value=DEFAULT_OUTPUT_PROFILE)
+        self.background_priority = tk.BooleanVar(value=False)
+        self.verify_quality = tk.BooleanVar(value=False)
+        self.auto_resolution = tk.BooleanVar(value=False)
+        self.extra_profile_vars = {name: tk.BooleanVar(value=False) for name in OUTPUT_PROFILES}
+        self.extra_output_heights = tk.StringVar(value="")
+        self.streaming_format = tk.StringVar(value="Single file")
+        self.mosaic_grid = tk.StringVar(value="Off")
+        self.max_output_pixels = DEFAULT_MAX_OUTPUT_PIXELS
+        self._base_dimensions_cache = None
+        self._file_list_version = 0 # Bumped by _file_list_changed on every add/remove/reorder; keys _base_dimensions_cache.
+        self._ui_update_after_ids = {}
+        self._resolution_request_id = 0
+        self.ui_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="ui-io")
+        self.encoding_thread = None
+        self.invalid_input_paths = []
+        self.output_files = []
+        self.current_streaming_format = None
+        self.current_settings = None
+        self.quality_report = None
+        self.ffmpeg_process = None
+        self.cancel_requested = threading.Event()
+        self.is_paused = False
         self.drag_data = {"item": None, "y": 0}
         self.widgets_to_disable = []
         self.treeview_bindings = {
@@ -184,16 +1937,17 @@ class ImagesToVideoSlideshow:
          }
         self.last_add_directory = None
         self.setup_ui()
-        self.quality_crf.trace_add("write", self.update_crf_status_label)
-        self.output_profile.trace_add("write", self.update_crf_status_label)
-        self.downscale_factor.trace_add("write", self._update_resolution_status_label)
-        self.downscale_enabled.trace_add("write", self._update_resolution_status_label)
+        self.quality_crf.trace_add("write", self._request_crf_status_update)
+        self.output_profile.trace_add("write", self._request_crf_status_update)
+        self.downscale_factor.trace_add("write", self._request_resolution_status_update)
+        self.downscale_enabled.trace_add("write", self._request_resolution_status_update)
+        self.auto_resolution.trace_add("write", self._request_resolution_status_update)
         self.update_crf_status_label()
-        config_filename = "ImagesToVideoSlideshowSettings.json"
-        self.config_file = Path(tempfile.gettempdir()) / config_filename
+        self.config_file = Path(tempfile.gettempdir()) / CONFIG_FILENAME
+        self.config_writer = CoalescingWriter(self.config_file, lambda config: json.dumps(config, indent=4).encode('utf-8'))
         self.output_file = None
         self.load_config()
-        self.root.after_idle(self._update_resolution_status_label)
+        self._request_resolution_status_update()
         self._set_initial_window_size()
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         self.save_config()
@@ -315,6 +2069,8 @@ class ImagesToVideoSlideshow:
         self.preset_frame.columnconfigure((0, 1), weight=1)
         self._create_button_with_tooltip(self.preset_frame, "Small WebM", self.apply_low_quality_webm_preset, "Preset for small .webm files (VP9 codec).", row=0, column=0, sticky='ew', padx=2, pady=2)
         self._create_button_with_tooltip(self.preset_frame, "Quality WebM", self.apply_quality_av1_webm_preset, "Preset for higher quality .webm files (AV1 codec - Slow encoding).", row=0, column=1, sticky='ew', padx=2, pady=2)
+        self._create_button_with_tooltip(self.preset_frame, "Save Job...", self.save_job, "Save the current settings and image list as a named job.", row=1, column=0, sticky='ew', padx=2, pady=2)
+        self._create_button_with_tooltip(self.preset_frame, "Load Job...", self.load_job, "Restore the settings and image list of a saved job.", row=1, column=1, sticky='ew', padx=2, pady=2)
         self.settings_frame = ttk.LabelFrame(self.settings_panel, text="Output Settings", padding=(10, 5))
         self.settings_frame.grid(row=1, column=0, sticky="ew", pady=(0, 10))
         self.settings_frame.bind("<Button-1>", self._clear_entry_focus)
@@ -333,6 +2089,31 @@ class ImagesToVideoSlideshow:
         self.output_profile.trace_add("write", update_profile_tooltip)
         self.widgets_to_disable.append(profile_combo)
         current_row += 1
+        ttk.Label(self.settings_frame, text="Output type:").grid(row=current_row, column=0, sticky="w", padx=2, pady=3)
+        streaming_combo = ttk.Combobox(self.settings_frame, textvariable=self.streaming_format, values=list(STREAMING_FORMATS.keys()), state='readonly', width=20)
+        streaming_combo.grid(row=current_row, column=1, sticky="ew", padx=(0, 5), pady=3)
+        self.create_tooltip(streaming_combo, "Single file: one video file.\nHLS/DASH: segmented stream for web players (fast start, cheap seeking).\n"
+                                             "Segments start on image boundaries. 'Extra heights' add renditions to the ladder.\nH.264 is the most widely supported codec for HLS.")
+        self.widgets_to_disable.append(streaming_combo)
+        current_row += 1
+        ttk.Label(self.settings_frame, text="Grid:").grid(row=current_row, column=0, sticky="w", padx=2, pady=3)
+        mosaic_combo = ttk.Combobox(self.settings_frame, textvariable=self.mosaic_grid, values=list(MOSAIC_GRIDS.keys()), state='readonly', width=20)
+        mosaic_combo.grid(row=current_row, column=1, sticky="ew", padx=(0, 5), pady=3)
+        self.create_tooltip(mosaic_combo, "Off: one image per frame.\nNxN: contact sheet, packs N*N images (in list order) into each frame.\n"
+                                          "'Time/Image' then applies to each sheet.")
+        self.widgets_to_disable.append(mosaic_combo)
+        current_row += 1
+        ttk.Label(self.settings_frame, text="Also encode:").grid(row=current_row, column=0, sticky="w", padx=2, pady=3)
+        self.extra_outputs_button = ttk.Menubutton(self.settings_frame, text="None", width=18)
+        self.extra_outputs_button.grid(row=current_row, column=1, sticky="ew", padx=(0, 5), pady=3)
+        extra_outputs_menu = tk.Menu(self.extra_outputs_button, tearoff=0)
+        for name, var in self.extra_profile_vars.items(): extra_outputs_menu.add_checkbutton(label=name, variable=var, command=self._update_extra_outputs_button)
+        self.extra_outputs_button['menu'] = extra_outputs_menu
+        self.create_tooltip(self.extra_outputs_button, "Extra formats written in the same pass.\nImages are decoded and scaled once and shared by every encoder.\nCRF is converted to each codec's own scale.")
+        self.widgets_to_disable.append(self.extra_outputs_button)
+        current_row += 1
+        self._create_settings_row(self.settings_frame, current_row, "Extra heights:", self.extra_output_heights, "Also write smaller versions at these heights, e.g. 720, 480.\nScaled from the same decoded frames. Leave empty for none.", entry_width=12)
+        current_row += 1
         self._create_settings_row(self.settings_frame, current_row, "Quality (CRF):", self.quality_crf, "Constant Rate Factor.\nLower = Better Quality, Larger File.\nVP9/AV1 (0-63), H.264 (0-51).")
         current_row += 1
         self.crf_status_label = ttk.Label(self.settings_frame, text="", width=35, foreground=CRF_STATUS_COLORS["default"], anchor='w')
@@ -352,9 +2133,25 @@ class ImagesToVideoSlideshow:
         self.multiplier_entry.bind("<FocusOut>", self._validate_downscale_factor)
         self.widgets_to_disable.append(self.multiplier_entry)
         current_row += 1
+        auto_resolution_checkbox = ttk.Checkbutton(self.settings_frame, text="Auto resolution (all images)", variable=self.auto_resolution)
+        auto_resolution_checkbox.grid(row=current_row, column=0, columnspan=2, sticky="w", padx=2, pady=3)
+        self.create_tooltip(auto_resolution_checkbox, "Size the video from all images (median aspect ratio and size)\ninstead of the first image. Reduces padding for mixed albums.")
+        self.widgets_to_disable.append(auto_resolution_checkbox)
+        current_row += 1
         self.resolution_status_label = ttk.Label(self.settings_frame, text="", width=35, foreground=CRF_STATUS_COLORS["default"], anchor='w')
         self.resolution_status_label.grid(row=current_row, column=0, columnspan=2, sticky="ew", padx=(5, 5), pady=(0, 3))
-        self.create_tooltip(self.resolution_status_label, "Original and calculated output resolution.")
+        self.resolution_tooltip = self.create_tooltip(self.resolution_status_label, "Original and calculated output resolution.")
+        current_row += 1
+        priority_checkbox = ttk.Checkbutton(self.settings_frame, text="Background priority", variable=self.background_priority)
+        priority_checkbox.grid(row=current_row, column=0, columnspan=2, sticky="w", padx=2, pady=3)
+        self.create_tooltip(priority_checkbox, "Run FFmpeg at a lower CPU/disk priority on half of the CPU cores,\nso other work on this machine stays responsive. Encoding takes longer.")
+        self.widgets_to_disable.append(priority_checkbox)
+        current_row += 1
+        verify_checkbox = ttk.Checkbutton(self.settings_frame, text="Verify quality after encoding", variable=self.verify_quality)
+        verify_checkbox.grid(row=current_row, column=0, columnspan=2, sticky="w", padx=2, pady=3)
+        self.create_tooltip(verify_checkbox, "Compare one frame per image with its source (SSIM/PSNR) once encoding is done.\n"
+                                             "Writes <video>.quality.json and selects images that lost too much detail,\nwith a suggested lower CRF.")
+        self.widgets_to_disable.append(verify_checkbox)
         current_row += 1
         self._toggle_downscale_entry_state()
         self.control_frame = ttk.LabelFrame(self.settings_panel, text="Image List Actions", padding=(10, 5))
@@ -371,6 +2168,12 @@ class ImagesToVideoSlideshow:
         self.sort_button = self._create_button_with_tooltip(self.control_frame, "Sort A-Z", self.sort_files_by_name, "Sort list by filename.", row=2, column=0, pady=section_pady, **btn_options)
         self.randomize_button = self._create_button_with_tooltip(self.control_frame, "Randomize", self.randomize_files, "Shuffle image order.", row=2, column=1, pady=section_pady, **btn_options)
         self._create_button_with_tooltip(self.control_frame, "Create Slideshow", self.start_slideshow, "Start video creation.", row=3, column=0, columnspan=2, pady=(15, 2), **btn_options)
+        self.pause_button = ttk.Button(self.control_frame, text="Pause", command=self.toggle_pause_slideshow, style='App.TButton')
+        self.pause_button.grid(row=4, column=0, pady=default_pady, **btn_options)
+        self.create_tooltip(self.pause_button, "Pause/resume the running encode.")
+        self.cancel_button = ttk.Button(self.control_frame, text="Cancel", command=self.cancel_slideshow, style='App.TButton')
+        self.cancel_button.grid(row=4, column=1, pady=default_pady, **btn_options)
+        self.create_tooltip(self.cancel_button, "Stop the running encode and discard the partial video.")
         self.tree_frame = ttk.Frame(self.main_frame)
         self.tree_frame.grid(row=0, column=1, sticky="nsew", padx=(0, 10), pady=(10, 5))
         self.tree_frame.grid_columnconfigure(0, weight=1); self.tree_frame.grid_rowconfigure(0, weight=1)
@@ -425,7 +2228,7 @@ class ImagesToVideoSlideshow:
     def add_images(self):
         files = filedialog.askopenfilenames(
             initialdir=self.last_add_directory,
-            filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp *.gif"), ("All files", "*.*")]
+            filetypes=[("Image files", " ".join(f"*{ext}" for ext in IMAGE_EXTENSIONS)), ("All files", "*.*")]
         )
         if files:
             try:
@@ -445,7 +2248,7 @@ class ImagesToVideoSlideshow:
         self.save_config()
 
         images = []
-        img_ext = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+        img_ext = IMAGE_EXTENSIONS
         for root, _, filenames in os.walk(folder):
             for name in filenames:
                 if name.lower().endswith(img_ext): images.append(os.path.join(root, name))
@@ -459,14 +2262,14 @@ class ImagesToVideoSlideshow:
     def add_files_to_tree(self, files):
         current_paths = {self.file_tree.item(item, "values")[2] for item in self.file_tree.get_children()}
         added_count = 0
-        img_ext = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+        img_ext = IMAGE_EXTENSIONS
         for file in files:
             norm_path = os.path.normpath(file)
             if norm_path not in current_paths and norm_path.lower().endswith(img_ext):
                 self.file_tree.insert("", "end", values=("🖼️", os.path.basename(norm_path), norm_path))
                 current_paths.add(norm_path)
                 added_count += 1
-        if added_count > 0: self._update_resolution_status_label()
+        if added_count > 0: self._file_list_changed()
         return added_count
 
     def _delete_tree_items(self, items_to_delete, confirm_message):
@@ -475,7 +2278,7 @@ class ImagesToVideoSlideshow:
         if messagebox.askyesno("Confirm", confirm_message, parent=self.root):
             for item in items_to_delete: self.file_tree.delete(item)
             self.status_message.config(text=f"Removed {count} item(s).")
-            self._update_resolution_status_label()
+            self._file_list_changed()
             return True
         return False
 
@@ -509,7 +2312,7 @@ class ImagesToVideoSlideshow:
     def handle_drop(self, event):
         raw_paths = self.parse_drop_data(event.data)
         to_add, folders_scanned = [], 0
-        img_ext = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+        img_ext = IMAGE_EXTENSIONS
         for path_str in raw_paths:
             path_obj = Path(path_str)
             if path_obj.is_file() and path_str.lower().endswith(img_ext): to_add.append(str(path_obj))
@@ -544,89 +2347,85 @@ class ImagesToVideoSlideshow:
             if items: self.file_tree.selection_set(items)
             return "break"
 
-    def _get_first_image_dimensions(self):
-        items = self.file_tree.get_children()
-        if not items: return None, None
-        path = self.file_tree.item(items[0], "values")[2]
-        try:
-            img = cv2.imread(path)
-            if img is None: raise ValueError(f"Could not read: {path}")
-            h, w = img.shape[:2]
-            return w, h
+    def _file_list_changed(self):
+        self._file_list_version += 1
+        self._request_resolution_status_update()
+
+    def _base_dimensions_key(self):
+        """Cache key for the base dimensions; cheap, it never walks the file list."""
+        return self._file_list_version, self.auto_resolution.get(), self.max_output_pixels
+
+    def _base_dimensions_args(self):
+        return [self.file_tree.item(item, "values")[2] for item in self.file_tree.get_children()], self.auto_resolution.get(), self.max_output_pixels
+
+    @staticmethod
+    def _compute_base_dimensions(paths, auto, max_pixels):
+        """Does the file I/O for the base dimensions, safe to run off the Tk thread. Returns (width, height, plan, error)."""
+        if not paths: return None, None, None, None
+        if auto:
+            plan = plan_output_resolution(paths, max_pixels)
+            if plan: logging.info(f"Resolution plan: {plan}"); return plan['width'], plan['height'], plan, None
+            logging.warning("Resolution planning found no readable images. Falling back to the first image.")
+        try: return *read_display_size(paths[0]), None, None
         except Exception as e:
-            logging.error(f"Error reading dimensions from {path}: {e}")
-            messagebox.showerror("Error", f"Error reading first image:\n{e}", parent=self.root)
-            return None, None
+            logging.error(f"Error reading dimensions from {paths[0]}: {e}")
+            return None, None, None, str(e)
+
+    def _get_output_base_dimensions(self):
+        """Dimensions the downscale factor applies to: the planned resolution in auto mode, otherwise the first image's size.
+        Always re-read before a render, since files may have been replaced on disk (header reads are cached by path, mtime and size)."""
+        key = self._base_dimensions_key()
+        w, h, _, error = result = self._compute_base_dimensions(*self._base_dimensions_args())
+        self._base_dimensions_cache = (key, result)
+        if error: messagebox.showerror("Error", f"Error reading first image:\n{error}", parent=self.root)
+        return w, h
 
     def _validate_and_get_settings(self):
-        settings = {}
         try:
-            time_sec = float(self.time_per_image_ms.get())
-            if time_sec <= 0: raise ValueError("Delay must be positive.")
-            settings['milliseconds_per_image'] = int(time_sec * 1000)
-            profile_str = self.output_profile.get()
-            codec, container = self._get_codec_container_from_profile(profile_str)
-            if not codec or not container: raise ValueError(f"Invalid profile: {profile_str}")
-            settings.update({'codec': codec, 'container': container, 'profile_str': profile_str})
-            first_w, first_h = self._get_first_image_dimensions()
+            first_w, first_h = self._get_output_base_dimensions()
             if first_w is None: self.status_message.config(text="Error reading first image."); return None
-            settings['target_width'], settings['target_height'] = first_w, first_h
-            if self.downscale_enabled.get():
-                factor = float(self.downscale_factor.get())
-                if not (0 < factor <= 1.0): raise ValueError("Downscale factor must be > 0 and <= 1.0.")
-                settings['target_width'] = max(1, int(first_w * factor))
-                settings['target_height'] = max(1, int(first_h * factor))
-                logging.info(f"Target (Downscaled x{factor}): {settings['target_width']}x{settings['target_height']}")
-            else: logging.info(f"Target (Original): {first_w}x{first_h}")
-            crf = int(self.quality_crf.get())
-            codec_ranges = {'libvpx-vp9': (0, 63, 'VP9/AV1'), 'libaom-av1': (0, 63, 'VP9/AV1'), 'libx264': (0, 51, 'H.264')}
-            if codec in codec_ranges:
-                min_crf, max_crf, name = codec_ranges[codec]
-                if not (min_crf <= crf <= max_crf): raise ValueError(f"Invalid CRF. For {name}, use {min_crf}-{max_crf}.")
-            else: raise ValueError(f"Unsupported codec for CRF validation: {codec}")
-            settings['crf'] = crf
-            return settings
+            return resolve_render_settings(self._settings_snapshot(), base_size=(first_w, first_h), memory_limit_mb=self.memory_limit_mb)
         except ValueError as e: messagebox.showerror("Error", str(e), parent=self.root); return None
         except Exception as e: logging.error(f"Unexpected validation error: {e}"); messagebox.showerror("Error", f"Unexpected validation error: {e}", parent=self.root); return None
 
-    def _escape_path_for_concat(self, path_str):
-        replacement = "'\\''"
-        escaped_inner = path_str.replace("'", replacement)
-        return f"'{escaped_inner}'"
-
     def start_slideshow(self):
         items = self.file_tree.get_children()
         if not items: messagebox.showerror("Error", "Please add images first."); return
         if hasattr(self, 'encoding_thread') and self.encoding_thread and self.encoding_thread.is_alive():
              logging.warning("Processing already in progress."); self.status_message.config(text="Processing..."); return
-        validated_settings = self._validate_and_get_settings()
-        if not validated_settings: return
+        self.current_metrics = RenderMetrics(profile=self.profile_render) if self.collect_metrics or self.profile_render else None
+        with _metrics_stage(self.current_metrics, 'validate_settings'): validated_settings = self._validate_and_get_settings()
+        if not validated_settings: self.current_metrics = None; return
         self._set_ui_state(False)
         self.root.title(f"{self.original_title} - Processing...")
         self.status_message.config(text="Validating settings..."); self.root.update_idletasks()
-        self.current_milliseconds_per_image = validated_settings['milliseconds_per_image']
         self.current_active_codec = validated_settings['codec']
         self.current_active_container = validated_settings['container']
-        self.final_output_width = validated_settings['target_width']
-        self.final_output_height = validated_settings['target_height']
-        self.current_quality_crf = validated_settings['crf']
+        self.current_background_priority = self.background_priority.get()
+        self.current_verify_quality = self.verify_quality.get(); self.quality_report = None
+        self.current_settings = validated_settings
+        self.current_streaming_format = validated_settings['streaming_format']
         self.input_files = [self.file_tree.item(item, "values")[2] for item in items]
         if not self.select_output_file():
              self.status_message.config(text="Output selection cancelled.")
              self._set_ui_state(True); self.root.title(self.original_title)
              return
         else: self.save_config()
+        self.output_files = render_output_files(validated_settings, self.output_file)
+        if not self._confirm_overwrite_extra_outputs():
+            self.status_message.config(text="Output selection cancelled.")
+            self._set_ui_state(True); self.root.title(self.original_title)
+            return
         self.status_message.config(text="Preparing FFmpeg..."); self.root.update_idletasks()
         try:
-            ffmpeg_cmd, self.concat_file_path = self._build_ffmpeg_concat_command()
-            self.status_message.config(text="Starting FFmpeg...")
-            self.root.update_idletasks()
             logging.info("Starting video encoding thread...")
             self.encoding_result_queue = queue.Queue()
+            self.cancel_requested.clear(); self.is_paused = False
+            self.invalid_input_paths = []
             while not self.progress_queue.empty():
                  try: self.progress_queue.get_nowait()
                  except queue.Empty: break
-            self.encoding_thread = threading.Thread(target=self._run_ffmpeg_thread, args=(ffmpeg_cmd, self.encoding_result_queue, self.progress_queue), daemon=True)
+            self.encoding_thread = threading.Thread(target=self._run_ffmpeg_thread, args=(self.encoding_result_queue, self.progress_queue), daemon=True)
             self.encoding_thread.start()
             self.root.after(100, self.check_queues)
         except Exception as e:
@@ -634,37 +2433,6 @@ class ImagesToVideoSlideshow:
             messagebox.showerror("Error", f"Failed to prepare FFmpeg command: {e}", parent=self.root)
             self.status_message.config(text="Error preparing FFmpeg.")
             self._set_ui_state(True); self.root.title(self.original_title)
-            if hasattr(self, 'concat_file_path') and self.concat_file_path and os.path.exists(self.concat_file_path):
-                 try: os.remove(self.concat_file_path); self.concat_file_path = None
-                 except OSError as clean_err: logging.warning(f"Could not remove temp file {self.concat_file_path}: {clean_err}")
-
-    def _build_ffmpeg_concat_command(self):
-        concat_path = ""
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt', encoding='utf-8') as f:
-            concat_path = f.name
-            logging.info(f"Generating concat file: {concat_path}")
-            duration_sec = self.current_milliseconds_per_image / 1000.0
-            last_file = None
-            for img_path in self.input_files:
-                if os.path.exists(img_path):
-                    f.write(f"file {self._escape_path_for_concat(img_path)}\n")
-                    f.write(f"duration {duration_sec}\n")
-                    last_file = img_path
-                else: logging.warning(f"Image file not found, skipping: {img_path}")
-            if last_file: f.write(f"file {self._escape_path_for_concat(last_file)}\n")
-        W, H = self.final_output_width, self.final_output_height
-        vf = f"scale={W}:{H}:force_original_aspect_ratio=decrease,pad={W}:{H}:(ow-iw)/2:(oh-ih)/2:color=black,format=pix_fmts=yuv420p"
-        cmd = [
-            self.ffmpeg_executable, '-y', '-f', 'concat', '-safe', '0', '-i', concat_path,
-            '-vf', vf, '-c:v', self.current_active_codec, '-crf', str(self.current_quality_crf),
-            '-progress', '-',
-        ]
-        codec = self.current_active_codec
-        if codec == 'libvpx-vp9': cmd.extend(['-speed', '1', '-tile-columns', '2', '-auto-alt-ref', '1', '-lag-in-frames', '25'])
-        elif codec == 'libx264': cmd.extend(['-preset', 'medium'])
-        elif codec == 'libaom-av1': cmd.extend(['-cpu-used', '4', '-row-mt', '1', '-tile-columns', '2', '-tile-rows', '2'])
-        cmd.append(self.output_file)
-        return cmd, concat_path
 
     def check_queues(self):
         latest_progress_line = None
@@ -674,13 +2442,35 @@ class ImagesToVideoSlideshow:
         except Exception as e: logging.error(f"Error reading progress queue: {e}")
         if latest_progress_line:
             cleaned_line = " ".join(latest_progress_line.split()).replace("= ", "=")
-            self.status_message.config(text=f"FFmpeg: {cleaned_line}")
+            self.status_message.config(text=f"FFmpeg: {cleaned_line}" if cleaned_line.startswith('frame=') else cleaned_line)
         try:
             success, message = self.encoding_result_queue.get_nowait()
             self._set_ui_state(True); self.root.title(self.original_title)
-            if success:
+            if success is None:
+                logging.info(f"Encoding cancelled: {message}")
+                self.status_message.config(text="Encoding cancelled.")
+            elif success and self.quality_report:
+                report = self.quality_report
+                logging.info(f"Slideshow created successfully! Mean SSIM {report['mean_ssim']}, {len(report['flagged'])} image(s) flagged.")
+                summary = f"Quality: mean SSIM {report['mean_ssim']}, worst {report['worst_ssim']}, mean PSNR {report['mean_psnr']} dB."
+                if report['flagged']:
+                    flagged_paths = set(report['flagged'])
+                    flagged_items = [item for item in self.file_tree.get_children() if self.file_tree.item(item, "values")[2] in flagged_paths]
+                    if flagged_items: self.file_tree.selection_set(flagged_items); self.file_tree.see(flagged_items[0])
+                    summary += (f"\n\n{len(report['flagged'])} image(s) fell below SSIM {report['min_ssim']} and are selected in the list."
+                                f"\nTry CRF {report['suggested_crf']} (now {report['crf']}).")
+                    self.status_message.config(text=f"Done: {len(report['flagged'])} image(s) below quality threshold.")
+                messagebox.showinfo("Success", f"Slideshow created:\n{message}\n\n{summary}\n\nReport: {self.output_file}.quality.json", parent=self.root)
+            elif success:
                 logging.info("Slideshow created successfully!")
                 messagebox.showinfo("Success", f"Slideshow created:\n{message}", parent=self.root)
+            elif self.invalid_input_paths:
+                logging.error(f"Input validation failed: {message}")
+                messagebox.showerror("Error", f"{message}\n\nNothing was encoded. The bad images are selected in the list; press Delete to remove them.", parent=self.root)
+                bad_paths = set(self.invalid_input_paths)
+                bad_items = [item for item in self.file_tree.get_children() if self.file_tree.item(item, "values")[2] in bad_paths]
+                if bad_items: self.file_tree.selection_set(bad_items); self.file_tree.see(bad_items[0])
+                self.status_message.config(text=f"Error: {len(self.invalid_input_paths)} bad image(s) selected.")
             else:
                 logging.error(f"FFmpeg error: {message}")
                 error_details = f"Error creating video (FFmpeg failed).\nCodec: {self.current_active_codec}\n\nDetails: {message}\n\nCheck log."
@@ -695,59 +2485,74 @@ class ImagesToVideoSlideshow:
              self.status_message.config(text="Error during final step.")
              self.cleanup()
 
-    def _run_ffmpeg_thread(self, ffmpeg_cmd, result_queue, progress_queue):
-        process, exit_code = None, -1; stderr_lines = []
+    def toggle_pause_slideshow(self):
+        process = self.ffmpeg_process
+        if not process or process.poll() is not None: return
+        try: _set_process_suspended(process, not self.is_paused)
+        except Exception as e:
+            logging.error(f"Could not {'resume' if self.is_paused else 'pause'} FFmpeg: {e}")
+            messagebox.showerror("Error", f"Could not pause/resume FFmpeg:\n{e}", parent=self.root); return
+        self.is_paused = not self.is_paused
+        logging.info("FFmpeg paused." if self.is_paused else "FFmpeg resumed.")
+        self.pause_button.config(text="Resume" if self.is_paused else "Pause")
+        self.root.title(f"{self.original_title} - {'Paused' if self.is_paused else 'Processing...'}")
+        self.status_message.config(text="Paused." if self.is_paused else "Resuming...")
+
+    def cancel_slideshow(self):
+        if not (self.encoding_thread and self.encoding_thread.is_alive()): return
+        render_complete = self._render_complete()
+        if render_complete:
+            if not messagebox.askyesno("Confirm", "Stop the quality check?\nThe finished video is kept.", parent=self.root): return
+        elif not messagebox.askyesno("Confirm", "Cancel the running encode?\nThe partial video will be deleted.", parent=self.root): return
+        logging.info("Cancelling quality check..." if render_complete else "Cancelling encode...")
+        self.cancel_requested.set()
+        self.status_message.config(text="Cancelling...")
+        process = self.ffmpeg_process
+        if process and process.poll() is None:
+            try:
+                if self.is_paused: _set_process_suspended(process, False)
+                process.terminate()
+            except Exception as e: logging.error(f"Error terminating FFmpeg: {e}")
+
+    def _run_ffmpeg_thread(self, result_queue, progress_queue):
+        success, message = False, "Encoding thread stopped unexpectedly."
         try:
-            cmd_str = ' '.join(shlex.quote(str(s)) for s in ffmpeg_cmd)
-            logging.info(f"Executing FFmpeg:\n  {cmd_str}")
-            flags = subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" and getattr(sys, 'frozen', False) else 0
-            if flags: logging.info("Using CREATE_NO_WINDOW for Popen.")
-            process = subprocess.Popen(ffmpeg_cmd, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
-                                      text=True, encoding='utf-8', errors='replace', bufsize=1, creationflags=flags)
-            for line in iter(process.stderr.readline, ''):
-                 line_strip = line.strip()
-                 logging.info(f"FFMPEG: {line_strip}")
-                 stderr_lines.append(line_strip)
-                 if line_strip.startswith('frame='): progress_queue.put(line_strip)
-            process.stderr.close(); process.wait()
-            exit_code = process.returncode
-            if exit_code != 0:
-                error_context = "\n".join(stderr_lines[-20:])
-                raise subprocess.CalledProcessError(exit_code, ffmpeg_cmd, output=None, stderr=error_context)
-            result_queue.put((True, ffmpeg_cmd[-1]))
-        except subprocess.CalledProcessError as e:
-             cmd_disp = ' '.join(map(shlex.quote, e.cmd))
-             err_log = f"FFmpeg failed!\nCode: {e.returncode}\nCmd: {cmd_disp}\nOutput:\n{e.stderr}"
-             logging.error(err_log); err_ui = f"Return Code: {e.returncode}\nCheck log for command/output."
-             result_queue.put((False, err_ui))
-        except FileNotFoundError:
-             msg = f"FFmpeg not runnable.\nPath: '{self.ffmpeg_executable}'\nEnsure it exists and has execute permissions."
-             logging.error(msg); result_queue.put((False, msg))
+            _, self.quality_report = render_slideshow(self.ffmpeg_executable, self.input_files, self.current_settings, self.output_file,
+                                                      cancel_event=self.cancel_requested, progress_callback=progress_queue.put,
+                                                      background_priority=self.current_background_priority, memory_limit_mb=self.memory_limit_mb,
+                                                      on_process=lambda process: setattr(self, 'ffmpeg_process', process),
+                                                      metrics=self.current_metrics, verify_quality=self.current_verify_quality)
+            success, message = True, "\n".join(self.output_files)
+            if self.current_verify_quality and self.quality_report is None: message += "\n\nQuality check did not complete (cancelled or failed, see log)."
+        except InterruptedError as e: success, message = None, str(e)
+        except InputValidationError as e:
+            self.invalid_input_paths = [path for path, _ in e.bad_inputs]
+            message = str(e)
+        except RenderError as e:
+            logging.error(f"FFmpeg failed!\nCode: {e.returncode}\nOutput:\n{e.stderr_tail}")
+            message = f"Return Code: {e.returncode}\nCheck log for command/output."
+        except FileNotFoundError as e:
+            message = f"FFmpeg not runnable.\nPath: '{self.ffmpeg_executable}'\nEnsure it exists and has execute permissions.\n\n{e}"
+            logging.error(message)
         except Exception as e:
-             logging.exception("Error during video creation thread:")
-             result_queue.put((False, f"Unexpected error in encoding thread: {e}"))
-        finally:
-            if process and process.poll() is None:
-                logging.warning("Terminating lingering FFmpeg process.")
-                try: process.terminate(); process.wait(timeout=2)
-                except Exception as term_err:
-                    logging.error(f"Error terminating FFmpeg: {term_err}")
-                    try: process.kill(); logging.warning("FFmpeg killed.")
-                    except Exception as kill_err: logging.error(f"Error killing FFmpeg: {kill_err}")
+            logging.exception("Error during video creation thread:")
+            message = f"Unexpected error in encoding thread: {e}"
+        finally: # Posted last, after render_slideshow released proxies and wrote metrics, so cleanup() on the Tk thread never races them.
+            self.ffmpeg_process = None
+            result_queue.put((success, message))
+
+    def _render_complete(self):
+        """FFmpeg exited cleanly, so the outputs are final and a cancel only stops the quality check."""
+        process = self.ffmpeg_process
+        return process is not None and process.poll() == 0
 
     def cleanup(self):
         self._set_ui_state(True); self.root.title(self.original_title)
-        if hasattr(self, 'concat_file_path') and self.concat_file_path:
-             try:
-                  if os.path.exists(self.concat_file_path):
-                       logging.info(f"Cleaning temp file: {self.concat_file_path}")
-                       os.remove(self.concat_file_path)
-             except OSError as e: logging.warning(f"Error cleaning temp file {self.concat_file_path}: {e}")
-             finally: self.concat_file_path = None
+        self.is_paused = False
         self.input_files = []
         self.encoding_thread = None
         current_status = self.status_message.cget("text")
-        if "successfully" not in current_status and "Error" not in current_status and "FFmpeg:" not in current_status:
+        if "successfully" not in current_status and "Error" not in current_status and "cancelled" not in current_status and "FFmpeg:" not in current_status:
              initial = "Ready. Drag & drop or use Add buttons." if isinstance(self.root, TkinterDnD.Tk) else "Ready. Use Add buttons."
              self.status_message.config(text=initial)
 
@@ -755,9 +2560,10 @@ class ImagesToVideoSlideshow:
         config_path = Path(self.config_file); config_loaded = False
         default_app_dir = self._get_app_directory()
         # Update defaults to match "Small WebM" preset
-        defaults = {'output_profile': "VP9 - .webm", 'quality_crf': "36", 'time_per_image_sec': "1.5",
-                    'downscale_enabled': True, 'downscale_factor': "0.5", 'output_file_hint': None,
-                    'last_add_directory': default_app_dir}
+        defaults = {**JOB_DEFAULTS, 'output_file_hint': None,
+                    'last_add_directory': default_app_dir, 'background_priority': False, 'verify_quality': False,
+                    'collect_metrics': False, 'profile_render': False, 'memory_limit_mb': DEFAULT_MEMORY_LIMIT_MB,
+                    'max_output_pixels': DEFAULT_MAX_OUTPUT_PIXELS}
         config = defaults.copy()
         if config_path.exists():
             try:
@@ -780,6 +2586,18 @@ class ImagesToVideoSlideshow:
                     logging.warning(f"Invalid downscale_factor '{config['downscale_factor']}'. Using default.")
                     config['downscale_factor'] = defaults['downscale_factor']
                 if not isinstance(config['downscale_enabled'], bool): config['downscale_enabled'] = defaults['downscale_enabled']
+                if not isinstance(config['background_priority'], bool): config['background_priority'] = defaults['background_priority']
+                if not isinstance(config['verify_quality'], bool): config['verify_quality'] = defaults['verify_quality']
+                if not isinstance(config['memory_limit_mb'], int) or config['memory_limit_mb'] < 0:
+                    logging.warning(f"Invalid memory_limit_mb '{config['memory_limit_mb']}'. Using default.")
+                    config['memory_limit_mb'] = defaults['memory_limit_mb']
+                if not isinstance(config['auto_resolution'], bool): config['auto_resolution'] = defaults['auto_resolution']
+                if not isinstance(config['extra_output_profiles'], list): config['extra_output_profiles'] = defaults['extra_output_profiles']
+                if config['streaming_format'] not in STREAMING_FORMATS: config['streaming_format'] = defaults['streaming_format']
+                if config['mosaic_grid'] not in MOSAIC_GRIDS: config['mosaic_grid'] = defaults['mosaic_grid']
+                if not isinstance(config['max_output_pixels'], int) or config['max_output_pixels'] <= 0:
+                    logging.warning(f"Invalid max_output_pixels '{config['max_output_pixels']}'. Using default.")
+                    config['max_output_pixels'] = defaults['max_output_pixels']
                 config_loaded = True
 
                 # Validate last_add_directory
@@ -809,27 +2627,91 @@ class ImagesToVideoSlideshow:
         self.time_per_image_ms.set(str(config.get('time_per_image_sec', defaults['time_per_image_sec'])))
         self.downscale_enabled.set(config.get('downscale_enabled', defaults['downscale_enabled']))
         self.downscale_factor.set(str(config.get('downscale_factor', defaults['downscale_factor'])))
+        self.background_priority.set(config.get('background_priority', defaults['background_priority']))
+        self.verify_quality.set(config.get('verify_quality', defaults['verify_quality']))
+        self.config_collect_metrics, self.config_profile_render = bool(config.get('collect_metrics')), bool(config.get('profile_render'))
+        self.collect_metrics = self.config_collect_metrics if self.cli_collect_metrics is None else self.cli_collect_metrics
+        self.profile_render = self.config_profile_render if self.cli_profile_render is None else self.cli_profile_render
+        self.memory_limit_mb = config.get('memory_limit_mb', defaults['memory_limit_mb'])
+        self.max_output_pixels = config.get('max_output_pixels', defaults['max_output_pixels'])
+        self.auto_resolution.set(config.get('auto_resolution', defaults['auto_resolution']))
+        extra_profiles = config.get('extra_output_profiles', defaults['extra_output_profiles'])
+        for name, var in self.extra_profile_vars.items(): var.set(name in extra_profiles)
+        self._update_extra_outputs_button()
+        self.extra_output_heights.set(str(config.get('extra_output_heights', defaults['extra_output_heights'])))
+        self.streaming_format.set(config.get('streaming_format', defaults['streaming_format']))
+        self.mosaic_grid.set(config.get('mosaic_grid', defaults['mosaic_grid']))
+        if self.collect_metrics or self.profile_render: logging.info(f"Render metrics enabled (cProfile: {self.profile_render}).")
 
         def finalize_load():
              # This call is now redundant here because _apply_preset (called by presets)
              # and the explicit setting of variables above will trigger necessary updates via traces.
              # However, _toggle_downscale_entry_state is still needed to set the initial state based on loaded config.
              self._toggle_downscale_entry_state() # Set initial state correctly
-             self.update_crf_status_label()
-             self._update_resolution_status_label()
+             self._request_crf_status_update()
+             self._request_resolution_status_update()
              status = "Settings loaded." if config_loaded else "Using default settings (Small WebM)."
              if not self.status_message.cget("text").startswith("FFmpeg:"): self.status_message.config(text=status)
              self.is_loading = False
         self.root.after_idle(finalize_load)
 
-    def save_config(self):
-        config = {'output_file_hint': self.output_file or None, 'time_per_image_sec': self.time_per_image_ms.get(),
+    def _settings_snapshot(self):
+        return {'output_file_hint': self.output_file or None, 'time_per_image_sec': self.time_per_image_ms.get(),
                   'downscale_factor': self.downscale_factor.get(), 'quality_crf': self.quality_crf.get(),
                   'output_profile': self.output_profile.get(), 'downscale_enabled': self.downscale_enabled.get(),
-                  'last_add_directory': self.last_add_directory}
-        try:
-            with open(self.config_file, 'w') as f: json.dump(config, f, indent=4)
-        except Exception as e: logging.warning(f"Could not save config '{self.config_file}': {e}")
+                  'last_add_directory': self.last_add_directory, 'background_priority': self.background_priority.get(),
+                  'verify_quality': self.verify_quality.get(),
+                  'collect_metrics': self.config_collect_metrics, 'profile_render': self.config_profile_render,
+                  'memory_limit_mb': self.memory_limit_mb, 'auto_resolution': self.auto_resolution.get(),
+                  'max_output_pixels': self.max_output_pixels,
+                  'extra_output_profiles': [name for name, var in self.extra_profile_vars.items() if var.get()],
+                  'extra_output_heights': self.extra_output_heights.get(), 'streaming_format': self.streaming_format.get(),
+                  'mosaic_grid': self.mosaic_grid.get()}
+
+    def save_config(self):
+        """Queues the current settings; the writer thread coalesces bursts of saves into one atomic write."""
+        self.config_writer.save(self._settings_snapshot())
+
+    def save_job(self):
+        JOB_PRESETS_DIR.mkdir(parents=True, exist_ok=True)
+        file_path = filedialog.asksaveasfilename(parent=self.root, initialdir=str(JOB_PRESETS_DIR), defaultextension=JOB_PRESET_SUFFIX,
+                                                 filetypes=[("Slideshow job", f"*{JOB_PRESET_SUFFIX}"), ("All files", "*.*")])
+        if not file_path: return
+        if not file_path.endswith(JOB_PRESET_SUFFIX): file_path = os.path.splitext(file_path)[0] + JOB_PRESET_SUFFIX
+        input_files = [self.file_tree.item(item, "values")[2] for item in self.file_tree.get_children()]
+        try: path = save_job_preset(file_path, self._settings_snapshot(), input_files)
+        except Exception as e:
+            logging.exception("Failed to save job preset:")
+            messagebox.showerror("Error", f"Could not save job:\n{e}", parent=self.root); return
+        logging.info(f"Saved job preset {path} ({len(input_files)} files).")
+        self.status_message.config(text=f"Saved job '{path.name[:-len(JOB_PRESET_SUFFIX)]}' with {len(input_files)} image(s).")
+
+    def load_job(self):
+        file_path = filedialog.askopenfilename(parent=self.root, initialdir=str(JOB_PRESETS_DIR) if JOB_PRESETS_DIR.is_dir() else self.last_add_directory,
+                                               filetypes=[("Slideshow job", f"*{JOB_PRESET_SUFFIX}"), ("All files", "*.*")])
+        if not file_path: return
+        try: settings, input_files = load_job_preset(file_path)
+        except ValueError as e: messagebox.showerror("Error", str(e), parent=self.root); return
+        self._apply_job_settings(settings)
+        if children := self.file_tree.get_children(): self.file_tree.delete(*children)
+        count = self.add_files_to_tree(input_files)
+        self._file_list_changed()
+        self.status_message.config(text=f"Loaded job '{Path(file_path).name[:-len(JOB_PRESET_SUFFIX)]}' with {count} image(s).")
+
+    def _apply_job_settings(self, settings):
+        if settings.get('output_profile') in OUTPUT_PROFILES: self.output_profile.set(settings['output_profile'])
+        for key, var in (('quality_crf', self.quality_crf), ('time_per_image_sec', self.time_per_image_ms),
+                         ('downscale_factor', self.downscale_factor), ('extra_output_heights', self.extra_output_heights)):
+            if key in settings: var.set(str(settings[key]))
+        for key, var in (('downscale_enabled', self.downscale_enabled), ('auto_resolution', self.auto_resolution)):
+            if isinstance(settings.get(key), bool): var.set(settings[key])
+        if isinstance(settings.get('extra_output_profiles'), list):
+            for name, var in self.extra_profile_vars.items(): var.set(name in settings['extra_output_profiles'])
+            self._update_extra_outputs_button()
+        if settings.get('streaming_format') in STREAMING_FORMATS: self.streaming_format.set(settings['streaming_format'])
+        if settings.get('mosaic_grid') in MOSAIC_GRIDS: self.mosaic_grid.set(settings['mosaic_grid'])
+        if settings.get('output_file_hint'): self.output_file = settings['output_file_hint']
+        self._toggle_downscale_entry_state()
 
     def select_output_file(self):
         container = self.current_active_container
@@ -837,7 +2719,8 @@ class ImagesToVideoSlideshow:
         codec_short = codec_map.get(self.current_active_codec, 'video')
         ts = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
         suggested = f"slideshow_{ts}_{codec_short}{container}"
-        filetypes = [(f"{container[1:].upper()} Video", f"*{container}"), ("All files", "*.*")]
+        file_kind = {'.m3u8': "HLS Playlist", '.mpd': "DASH Manifest"}.get(container, f"{container[1:].upper()} Video")
+        filetypes = [(file_kind, f"*{container}"), ("All files", "*.*")]
 
         # Determine initial directory for saving
         initial_dir = None
@@ -874,6 +2757,13 @@ class ImagesToVideoSlideshow:
             self.status_message.config(text="Output selection cancelled.")
             return False
 
+    def _confirm_overwrite_extra_outputs(self):
+        """The save dialog only confirms replacing the main file; FFmpeg (-y) would silently replace extra variants and HLS/DASH segments too."""
+        existing = sorted(set(snapshot_render_outputs(self.output_file, self.output_files, self.current_streaming_format)) - {self.output_file})
+        if not existing: return True
+        names = "\n".join(os.path.basename(path) for path in existing[:8]) + (f"\n... and {len(existing) - 8} more" if len(existing) > 8 else "")
+        return messagebox.askyesno("Confirm", f"These files from an earlier render will be replaced:\n\n{names}\n\nContinue?", parent=self.root)
+
     def run(self): self.root.mainloop()
 
     def randomize_files(self):
@@ -882,7 +2772,7 @@ class ImagesToVideoSlideshow:
             random.shuffle(items)
             for i, item_id in enumerate(items): self.file_tree.move(item_id, '', i)
             self.status_message.config(text="List randomized.")
-            self._update_resolution_status_label()
+            self._file_list_changed()
 
     def sort_files_by_name(self):
         items = self.file_tree.get_children()
@@ -891,7 +2781,7 @@ class ImagesToVideoSlideshow:
             items_data.sort()
             for i, (_, item_id) in enumerate(items_data): self.file_tree.move(item_id, '', i)
             self.status_message.config(text="List sorted by filename.")
-            self._update_resolution_status_label()
+            self._file_list_changed()
 
     def on_drag_start(self, event):
         if item := self.file_tree.identify_row(event.y):
@@ -906,7 +2796,7 @@ class ImagesToVideoSlideshow:
     def on_drag_drop(self, event):
         if self.drag_data["item"]:
             self.status_message.config(text="Item moved.")
-            self._update_resolution_status_label()
+            self._file_list_changed()
         self.drag_data = {"item": None, "y": 0}; self.root.config(cursor="")
 
     def clear_all_files(self):
@@ -952,6 +2842,17 @@ class ImagesToVideoSlideshow:
         else: state = 'disabled'
         if hasattr(self, 'multiplier_entry'): self.multiplier_entry.config(state=state)
 
+    def _schedule_ui_update(self, name, callback, delay_ms=UI_DEBOUNCE_MS):
+        """Debounces callback: repeated requests under the same name within delay_ms collapse into one call."""
+        if (after_id := self._ui_update_after_ids.pop(name, None)): self.root.after_cancel(after_id)
+        def run():
+            self._ui_update_after_ids.pop(name, None)
+            callback()
+        self._ui_update_after_ids[name] = self.root.after(delay_ms, run)
+
+    def _request_crf_status_update(self, *args): self._schedule_ui_update('crf_status', self.update_crf_status_label)
+    def _request_resolution_status_update(self, *args): self._schedule_ui_update('resolution_status', self._update_resolution_status_label)
+
     def update_crf_status_label(self, *args):
         if not hasattr(self, 'crf_status_label') or not self.crf_status_label.winfo_exists(): return
         status, color = "", CRF_STATUS_COLORS["default"]
@@ -975,37 +2876,79 @@ class ImagesToVideoSlideshow:
         except ValueError: status, color = "Invalid CRF (Number Required)", CRF_STATUS_COLORS["error"]
         self.crf_status_label.config(text=status, foreground=color)
 
+    def _update_extra_outputs_button(self):
+        selected = [CODEC_SHORT_NAMES.get(OUTPUT_PROFILES[name]['codec'], name).upper() for name, var in self.extra_profile_vars.items() if var.get()]
+        self.extra_outputs_button.config(text=", ".join(selected) if selected else "None")
+
     def _apply_preset(self, profile, crf, downscale_enabled, downscale_factor, status):
         self.output_profile.set(profile); self.quality_crf.set(crf)
         self.downscale_enabled.set(downscale_enabled); self.downscale_factor.set(downscale_factor)
         # Explicitly update the entry state after changing the variable
         self._toggle_downscale_entry_state()
-        # The traces on the variables will call update_crf_status_label and _update_resolution_status_label automatically.
+        # The traces on the variables schedule one debounced update_crf_status_label and _update_resolution_status_label.
         self.status_message.config(text=status)
 
     def apply_low_quality_webm_preset(self): self._apply_preset("VP9 - .webm", "36", True, "0.5", "Applied 'Small WebM' preset (VP9).")
     def apply_quality_av1_webm_preset(self): self._apply_preset("AV1 - .webm", "24", False, "1.0", "Applied 'Quality WebM' preset (AV1).")
 
     def _update_resolution_status_label(self, *args):
+        """Reads image headers (or decodes the first image) on ui_executor and applies the result on the Tk thread once done.
+        Results are cached per file list, so changing only the downscale factor never touches the disk."""
         if self.is_loading or not hasattr(self, 'resolution_status_label') or not self.resolution_status_label.winfo_exists(): return
+        key = self._base_dimensions_key()
+        if self._base_dimensions_cache and self._base_dimensions_cache[0] == key: return self._apply_resolution_status(self._base_dimensions_cache[1])
+        self._resolution_request_id += 1
+        paths, auto, max_pixels = self._base_dimensions_args()
+        request_id, future = self._resolution_request_id, self.ui_executor.submit(self._compute_base_dimensions, paths, auto, max_pixels)
+        if paths: self.resolution_status_label.config(text="Reading image dimensions...", foreground=CRF_STATUS_COLORS["default"])
+        def poll():
+            if request_id != self._resolution_request_id: return # Superseded by a newer file list or setting.
+            if not future.done(): self.root.after(UI_POLL_MS, poll); return
+            try: result = future.result()
+            except Exception as e: logging.exception("Resolution update failed:"); result = (None, None, None, str(e))
+            self._base_dimensions_cache = (key, result)
+            if self.resolution_status_label.winfo_exists(): self._apply_resolution_status(result)
+        poll()
+
+    def _apply_resolution_status(self, result):
+        first_w, first_h, plan, _ = result
         status, color = "(Add images to see resolution)", CRF_STATUS_COLORS["default"]
+        tooltip_text = "Original and calculated output resolution."
+        auto = self.auto_resolution.get()
         if self.file_tree.get_children():
-            first_w, first_h = self._get_first_image_dimensions()
             if first_w:
+                if auto and plan:
+                    tooltip_text = (f"Planned from {plan['images_measured']} images (median aspect {plan['median_aspect']}).\n"
+                                    f"First image: {plan['first_width']}x{plan['first_height']}, {plan['padding_first_pct']}% padding.\n"
+                                    f"Planned: {plan['width']}x{plan['height']}, {plan['padding_planned_pct']}% padding, "
+                                    f"{plan['encoder_pixels_saved_pct']}% fewer pixels to encode.")
                 if self.downscale_enabled.get():
                     try:
                         factor = float(self.downscale_factor.get())
                         if not (0 < factor <= 1.0): raise ValueError("Factor out of range (0, 1.0]")
-                        target_w, target_h = max(1, int(first_w * factor)), max(1, int(first_h * factor))
-                        status, color = f"Downscale {first_w}x{first_h} → {target_w}x{target_h}", CRF_STATUS_COLORS["info"]
-                    except ValueError: status, color = f"Original: {first_w}x{first_h}, Invalid Factor", CRF_STATUS_COLORS["error"]
-                else: status = f"Original Resolution: {first_w}x{first_h}"
+                        target_w, target_h = output_target_size(first_w, first_h, factor)
+                        status, color = f"{'Auto' if auto else 'Downscale'} {first_w}x{first_h} → {target_w}x{target_h}", CRF_STATUS_COLORS["info"]
+                    except ValueError: status, color = f"{'Auto' if auto else 'Original'}: {first_w}x{first_h}, Invalid Factor", CRF_STATUS_COLORS["error"]
+                else:
+                    target_w, target_h = output_target_size(first_w, first_h)
+                    status = f"{'Auto' if auto else 'Original'} Resolution: {first_w}x{first_h}" + (f" → {target_w}x{target_h}" if (target_w, target_h) != (first_w, first_h) else "")
             else: status, color = "(Error reading first image)", CRF_STATUS_COLORS["error"]
         self.resolution_status_label.config(text=status, foreground=color)
+        self.resolution_tooltip.text = tooltip_text
 
     def _on_close(self):
         logging.info("Closing application, saving settings...")
         self.save_config()
+        self.config_writer.flush()
+        self.ui_executor.shutdown(wait=False, cancel_futures=True)
+        process = self.ffmpeg_process
+        if process and process.poll() is None:
+            logging.warning("Terminating running FFmpeg on close.")
+            self.cancel_requested.set()
+            try:
+                if self.is_paused: _set_process_suspended(process, False)
+                process.terminate()
+            except Exception as e: logging.error(f"Error terminating FFmpeg on close: {e}")
         for handler in logging.getLogger().handlers[:]:
              if isinstance(handler, logging.FileHandler):
                   try: handler.close(); logging.getLogger().removeHandler(handler)
@@ -1055,8 +2998,12 @@ class ImagesToVideoSlideshow:
         except Exception as e: logging.error(f"Error configuring file_tree state: {e}")
         if enabled: self._toggle_downscale_entry_state()
         elif hasattr(self, 'multiplier_entry'): self.multiplier_entry.config(state='disabled')
+        if hasattr(self, 'cancel_button'):
+            self.cancel_button.config(state='disabled' if enabled else 'normal')
+            self.pause_button.config(state='disabled' if enabled else 'normal', text="Pause")
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Quality verification workers in frozen (PyInstaller) builds.
     try: import tkinterdnd2
     except ImportError: logging.warning("Optional: Install 'tkinterdnd2-universal' for drag & drop.")
     if sys.platform.startswith('win'):
@@ -1067,8 +3014,55 @@ if __name__ == "__main__":
             else: logging.info(f"DPI awareness already set (value: {awareness.value}).")
         except (AttributeError, OSError, Exception) as e: logging.warning(f"Could not set/get DPI awareness: {e}")
     sys.excepthook = handle_unhandled_exception
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Create video slideshows from images.")
+    arg_parser.add_argument('--metrics', action='store_true', help="Write <output>.metrics.json with per-stage timings and counters.")
+    arg_parser.add_argument('--profile', action='store_true', help="Also write a cProfile dump (<output>.prof) and per-step FFmpeg timings.")
+    arg_parser.add_argument('--watch', nargs='+', metavar='DIR', help="Run headless: render every batch subfolder dropped into DIR once it settles.")
+    arg_parser.add_argument('--output-dir', help="Where --watch/--serve write videos (default: DIR/rendered for the first DIR; a temp folder for --serve).")
+    arg_parser.add_argument('--job', help="Saved job preset (name or .json.gz path) whose settings --watch uses; default: the GUI's saved settings.")
+    arg_parser.add_argument('--settle', type=float, default=WATCH_SETTLE_SEC, help="Seconds a batch must stay unchanged before it renders.")
+    arg_parser.add_argument('--poll', type=float, default=WATCH_POLL_SEC, help="Seconds between folder scans.")
+    arg_parser.add_argument('--cpu-budget', type=int, default=None, help="CPU cores all --watch renders may use together (default: all).")
+    arg_parser.add_argument('--jobs', type=int, default=None, help=f"Concurrent renders (--watch default: cpu budget / {WATCH_THREADS_PER_RENDER}; --serve default: 1).")
+    arg_parser.add_argument('--serve', nargs='?', type=int, const=SERVICE_DEFAULT_PORT, metavar='PORT', help=f"Run headless: local HTTP render service (default port {SERVICE_DEFAULT_PORT}).")
+    arg_parser.add_argument('--host', default='127.0.0.1', help="Interface --serve binds to.")
+    arg_parser.add_argument('--token', default=None, help="Token --serve clients must send (default: random, logged at start; '' disables it).")
+    arg_parser.add_argument('--ffmpeg', default=None, help="FFmpeg executable for headless modes (default: next to main.py, then PATH).")
+    arg_parser.add_argument('--background-priority', action=argparse.BooleanOptionalAction, default=None,
+                            help="Run headless renders at low CPU/IO priority (default: the GUI's saved setting).")
+    arg_parser.add_argument('--memory-limit-mb', type=int, default=None, help="Memory budget for headless renders, 0 for none (default: the GUI's saved setting).")
+    cli_args, _ = arg_parser.parse_known_args()
+    if cli_args.watch or cli_args.serve is not None:
+        ffmpeg_executable = cli_args.ffmpeg or find_ffmpeg_executable()
+        if not ffmpeg_executable: arg_parser.error("FFmpeg not found, pass --ffmpeg.")
+        background_priority, memory_limit_mb = load_render_options()
+        if cli_args.background_priority is not None: background_priority = cli_args.background_priority
+        if cli_args.memory_limit_mb is not None: memory_limit_mb = max(0, cli_args.memory_limit_mb)
+    if cli_args.serve is not None:
+        service = RenderService(ffmpeg_executable, cli_args.output_dir or Path(tempfile.gettempdir()) / "ImagesToVideoSlideshowService", cli_args.jobs or 1,
+                                memory_limit_mb, background_priority)
+        token = secrets.token_urlsafe(16) if cli_args.token is None else cli_args.token
+        server = create_render_server(service, cli_args.host, cli_args.serve, token or None)
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+        logging.info(f"Render service listening on http://{server.server_address[0]}:{server.server_address[1]}/jobs (output: {service.output_dir}).")
+        if token: logging.info(f"Service token: {token} (send as 'Authorization: Bearer <token>' or ?token=<token>).")
+        try: server.serve_forever()
+        except KeyboardInterrupt: pass
+        server.server_close(); service.shutdown()
+        logging.info("Render service stopped.")
+        sys.exit(0)
+    if cli_args.watch:
+        try: job_settings = load_job_settings(cli_args.job)
+        except ValueError as e: arg_parser.error(str(e))
+        watcher = FolderWatcher(cli_args.watch, cli_args.output_dir or os.path.join(cli_args.watch[0], "rendered"), job_settings, ffmpeg_executable,
+                                cli_args.settle, cli_args.poll, cli_args.cpu_budget, cli_args.jobs, background_priority, memory_limit_mb)
+        signal.signal(signal.SIGTERM, lambda *_: watcher.stop_event.set())
+        try: watcher.run()
+        except KeyboardInterrupt: logging.info("Watch mode stopped.")
+        sys.exit(0)
     try:
-        app = ImagesToVideoSlideshow()
+        app = ImagesToVideoSlideshow(collect_metrics=True if cli_args.metrics else None, profile_render=True if cli_args.profile else None)
         app.run()
     except Exception:
         logging.critical("Exception during app initialization or main loop start:", exc_info=True)